@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+from history_loader import HistoryBuilder, StreamingHistory
+
+
+MS_PER_HOUR = 1000 * 60 * 60
+
+
+class PlayAggregates:
+    """
+    Summary: vectorized listening time rollups over a play history.
+    The history is reduced to int32 group codes and int64 msPlayed once, every
+    total afterwards is a single np.bincount over those columns.
+    """
+
+    def __init__(self, history):
+        if not isinstance(history, StreamingHistory):
+            # Plain list of StreamingHistory records
+            builder = HistoryBuilder()
+            builder.add_batch(list(history))
+            history = builder.build()
+        self.history = history
+        self.ms_played = history.ms_played.astype(np.int64, copy=False)
+
+    def _totals(self, codes, size):
+        ms = np.bincount(codes, weights=self.ms_played, minlength=size)
+        plays = np.bincount(codes, minlength=size)
+        return ms.astype(np.int64), plays
+
+    def artist_totals(self):
+        """
+        Summary: msPlayed and play count per artist
+        """
+        names = self.history.artist_names
+        ms, plays = self._totals(self.history.artist_codes, len(names))
+        return pd.DataFrame({'msPlayed': ms, 'plays': plays}, index=pd.Index(names, name='artistName'))
+
+    def track_totals(self):
+        """
+        Summary: msPlayed and play count per (artist, track) pair, so songs that
+        share a title across artists are kept apart
+        """
+        n_tracks = len(self.history.track_names)
+        pair = self.history.artist_codes.astype(np.int64) * n_tracks + self.history.track_codes
+        pairs, codes = np.unique(pair, return_inverse=True)
+        ms, plays = self._totals(codes, len(pairs))
+        index = pd.MultiIndex.from_arrays(
+            [self.history.artist_names[pairs // n_tracks], self.history.track_names[pairs % n_tracks]],
+            names=['artistName', 'trackName'])
+        return pd.DataFrame({'msPlayed': ms, 'plays': plays}, index=index)
+
+    def daily_totals(self):
+        """
+        Summary: msPlayed and play count per calendar day, days without plays included
+        """
+        days = self.history.end_time.astype('datetime64[D]')
+        if len(days) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return pd.DataFrame({'msPlayed': empty, 'plays': empty}, index=pd.DatetimeIndex([], name='day'))
+        first = days.min()
+        codes = (days - first).astype(np.int64)
+        ms, plays = self._totals(codes, int(codes.max()) + 1)
+        index = pd.DatetimeIndex(first + np.arange(len(ms)), name='day')
+        return pd.DataFrame({'msPlayed': ms, 'plays': plays}, index=index)
+
+    def monthly_totals(self):
+        """
+        Summary: msPlayed and play count per calendar month, months without plays included
+        """
+        months = self.history.end_time.astype('datetime64[M]')
+        if len(months) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return pd.DataFrame({'msPlayed': empty, 'plays': empty}, index=pd.PeriodIndex([], freq='M', name='month'))
+        first = months.min()
+        codes = (months - first).astype(np.int64)
+        ms, plays = self._totals(codes, int(codes.max()) + 1)
+        index = pd.PeriodIndex((first + np.arange(len(ms))).astype(str), freq='M', name='month')
+        return pd.DataFrame({'msPlayed': ms, 'plays': plays}, index=index)
+
+    def hourly_totals(self):
+        """
+        Summary: msPlayed and play count per hour of the day (0-23)
+        """
+        minutes = self.history.end_time.astype('datetime64[m]').astype(np.int64)
+        hours = (minutes // 60) % 24
+        ms, plays = self._totals(hours, 24)
+        return pd.DataFrame({'msPlayed': ms, 'plays': plays}, index=pd.RangeIndex(24, name='hour'))
+
+
+def to_hours(ms):
+    return ms / MS_PER_HOUR
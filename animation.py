@@ -0,0 +1,108 @@
+import threading
+from PIL import Image, ImageSequence, ImageTk
+from instrumentation import span
+
+
+FRAME_DELAY_MS = 100
+
+
+class GifFrames:
+    """
+    Summary: frames of one GIF, shared by every window that plays it.
+    Frames are decoded to RGBA on a background thread as soon as the GIF is first
+    requested, and each frame becomes a Tk PhotoImage the first time it is shown.
+    Both are kept for the life of the process, so reopening a window decodes nothing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._decoded = []
+        self._photos = []
+        self._complete = False
+        self._lock = threading.Lock()
+        threading.Thread(target=self._decode, name=f"decode {path}", daemon=True).start()
+
+    def _decode(self):
+        try:
+            with span("gif.decode", path=self.path), Image.open(self.path) as gif:
+                for frame in ImageSequence.Iterator(gif):
+                    rgba = frame.convert('RGBA')
+                    with self._lock:
+                        self._decoded.append(rgba)
+        except (OSError, EOFError):
+            pass
+        finally:
+            self._complete = True
+
+    def available(self):
+        """
+        Summary: number of frames ready to show, and whether that is all of them
+        """
+        with self._lock:
+            return len(self._decoded), self._complete
+
+    def photo(self, index):
+        """
+        Summary: PhotoImage of a decoded frame, must be called on the Tk thread
+        """
+        while len(self._photos) <= index:
+            with self._lock:
+                frame = self._decoded[len(self._photos)]
+            self._photos.append(ImageTk.PhotoImage(frame))
+        return self._photos[index]
+
+
+_frames = {}
+
+
+def get_frames(path):
+    frames = _frames.get(path)
+    if frames is None:
+        frames = _frames[path] = GifFrames(path)
+    return frames
+
+
+def preload(*paths):
+    """
+    Summary: starts decoding GIFs in the background before any window needs them
+    """
+    for path in paths:
+        get_frames(path)
+
+
+class GifPlayer:
+    """
+    Summary: plays a GIF on a Label with an after loop that is cancelled when the
+    label is destroyed. Playback starts with the first decoded frame and loops over
+    the frames decoded so far until the whole GIF is ready.
+    """
+
+    def __init__(self, label, path, delay=FRAME_DELAY_MS):
+        self.label = label
+        self.frames = get_frames(path)
+        self.delay = delay
+        self.index = 0
+        self._after_id = None
+        label.bind("<Destroy>", lambda event: self.stop(), add="+")
+
+    def start(self):
+        self._tick()
+        return self
+
+    def stop(self):
+        if self._after_id is not None:
+            try:
+                self.label.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _tick(self):
+        count, complete = self.frames.available()
+        if count:
+            self.index %= count
+            self.label.configure(image=self.frames.photo(self.index))
+            self.index += 1
+            if complete:
+                self.index %= count
+        self._after_id = self.label.after(self.delay, self._tick)
@@ -0,0 +1,296 @@
+"""
+Batch analysis of many users' streaming history exports at once.
+
+    python batch_analysis.py exports/ -o batch_results
+
+Every entry of the exports directory is one user: a directory or zip archive holding
+an export, or a single JSON file. Users are split into chunks that run on a process
+pool. A worker handles one user at a time and keeps only that user's top artists,
+top tracks and rollups, so its memory is bounded by the largest single export.
+Each finished chunk is written as a part, an interrupted run picks up from the parts
+already on disk. The parts are then merged into one columnar table per result under
+<output>/results, read back with load_table().
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from history_loader import SHARD_PATTERN, load_history
+from aggregation import PlayAggregates
+from topk import top_k_positions
+
+USERS_PER_CHUNK = 32
+TOP_N = 10
+MAX_WORKERS = 4
+# Worker processes are replaced after this many chunks so memory freed by large exports goes back to the OS
+CHUNKS_PER_WORKER = 8
+TABLES = ['users', 'top_artists', 'top_tracks', 'monthly', 'hourly']
+
+
+# --- COLUMNAR TABLES ---
+def _write_json(path, value):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(value, file)
+
+
+def save_table(df, path):
+    """
+    Summary: writes a DataFrame as one .npy file per column, text columns as int32
+    codes plus a names list, the same layout as the catalog cache
+    """
+    os.makedirs(path, exist_ok=True)
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if values.dtype == object or isinstance(values.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                categories = values.array
+            else:
+                categories = pd.Categorical(values.astype(str))
+            np.save(os.path.join(path, f"{column}.npy"), categories.codes.astype(np.int32))
+            _write_json(os.path.join(path, f"{column}.names.json"), [str(name) for name in categories.categories])
+            columns[column] = 'category'
+        else:
+            array = values.to_numpy()
+            np.save(os.path.join(path, f"{column}.npy"), array)
+            columns[column] = str(array.dtype)
+    _write_json(os.path.join(path, "meta.json"), {'columns': columns, 'rows': len(df)})
+
+
+def load_table(path):
+    """
+    Summary: memory-maps a table written by save_table into a DataFrame
+    """
+    with open(os.path.join(path, "meta.json"), encoding='utf-8') as file:
+        meta = json.load(file)
+    data = {}
+    for column, dtype in meta['columns'].items():
+        values = np.load(os.path.join(path, f"{column}.npy"), mmap_mode='r')
+        if dtype == 'category':
+            with open(os.path.join(path, f"{column}.names.json"), encoding='utf-8') as file:
+                # An explicit dtype, or the empty names of a zero-row part come back as object
+                values = pd.Categorical.from_codes(values, pd.Index(json.load(file), dtype=str))
+        data[column] = values
+    return pd.DataFrame(data, copy=False)
+
+
+# --- PER-USER ANALYSIS ---
+def discover_exports(root):
+    """
+    Summary: (user id, export path) of every user under root, sorted by user id.
+    Loose shard files directly in root are taken as one more user named after root.
+    """
+    users = {}
+    loose_shards = False
+    for entry in sorted(os.listdir(root)):
+        path = os.path.join(root, entry)
+        stem, extension = os.path.splitext(entry)
+        if os.path.isdir(path):
+            user = entry
+        elif SHARD_PATTERN.match(entry):
+            loose_shards = True
+            continue
+        elif extension.lower() in ('.zip', '.json'):
+            user = stem
+        else:
+            continue
+        if user in users:
+            user = entry
+        users[user] = path
+    if loose_shards:
+        users.setdefault(os.path.basename(os.path.abspath(root)), root)
+    return sorted(users.items())
+
+
+def analyze_user(user, history, top_n=TOP_N):
+    """
+    Summary: the result rows of one user, as a dict of table name -> DataFrame
+    """
+    aggregates = PlayAggregates(history)
+    n = len(history)
+
+    artists = aggregates.artist_totals()
+    artist_ms = artists['msPlayed'].to_numpy()
+    top = top_k_positions(artist_ms, top_n)
+    top_artists = pd.DataFrame({
+        'user': user, 'rank': np.arange(1, len(top) + 1, dtype=np.int16),
+        'artist': artists.index.to_numpy()[top], 'ms_played': artist_ms[top],
+        'plays': artists['plays'].to_numpy()[top],
+    })
+
+    tracks = aggregates.track_totals()
+    track_ms = tracks['msPlayed'].to_numpy()
+    top = top_k_positions(track_ms, top_n)
+    top_tracks = pd.DataFrame({
+        'user': user, 'rank': np.arange(1, len(top) + 1, dtype=np.int16),
+        'artist': tracks.index.get_level_values('artistName').to_numpy()[top],
+        'track': tracks.index.get_level_values('trackName').to_numpy()[top],
+        'ms_played': track_ms[top], 'plays': tracks['plays'].to_numpy()[top],
+    })
+
+    monthly = aggregates.monthly_totals()
+    hourly = aggregates.hourly_totals()
+    end_time = history.end_time
+    users = pd.DataFrame({
+        'user': [user], 'plays': [n], 'ms_played': [int(aggregates.ms_played.sum())],
+        'artists': [int((artists['plays'].to_numpy() > 0).sum())], 'tracks': [len(tracks)],
+        'first_play': [end_time.min() if n else np.datetime64('NaT', 'm')],
+        'last_play': [end_time.max() if n else np.datetime64('NaT', 'm')],
+        'top_artist': [top_artists['artist'].iloc[0] if len(top_artists) else ""],
+    })
+    return {
+        'users': users,
+        'top_artists': top_artists,
+        'top_tracks': top_tracks,
+        'monthly': pd.DataFrame({
+            'user': user, 'month': monthly.index.to_timestamp().to_numpy().astype('datetime64[M]'),
+            'ms_played': monthly['msPlayed'].to_numpy(), 'plays': monthly['plays'].to_numpy()}),
+        'hourly': pd.DataFrame({
+            'user': user, 'hour': np.arange(24, dtype=np.int8),
+            'ms_played': hourly['msPlayed'].to_numpy(), 'plays': hourly['plays'].to_numpy()}),
+    }
+
+
+def _part_path(output_dir, chunk_id):
+    return os.path.join(output_dir, "parts", f"{chunk_id:06d}")
+
+
+def analyze_chunk(chunk_id, users, output_dir, top_n=TOP_N):
+    """
+    Summary: runs in a pool process. Analyzes the users of one chunk one at a time and
+    writes their rows as a part, replaced into place only once complete.
+    Returns (chunk id, users analyzed, errors).
+    """
+    results = {table: [] for table in TABLES}
+    errors = []
+    for user, path in users:
+        try:
+            history = load_history(path)
+            for table, rows in analyze_user(user, history, top_n).items():
+                results[table].append(rows)
+        except Exception as e:
+            errors.append(f"{user}: {e}")
+
+    part_path = _part_path(output_dir, chunk_id)
+    tmp_path = part_path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for table, frames in results.items():
+        if frames:
+            save_table(pd.concat(frames, ignore_index=True), os.path.join(tmp_path, table))
+    _write_json(os.path.join(tmp_path, "errors.json"), errors)
+    shutil.rmtree(part_path, ignore_errors=True)
+    os.replace(tmp_path, part_path)
+    return chunk_id, len(users) - len(errors), errors
+
+
+# --- BATCH DRIVER ---
+def load_plan(root, output_dir, users_per_chunk=USERS_PER_CHUNK):
+    """
+    Summary: the chunks of this batch. The plan is saved with the results so a resumed
+    run keeps the same chunks; users added to root since then form new chunks.
+    """
+    plan_path = os.path.join(output_dir, "plan.json")
+    plan = {'root': os.path.abspath(root), 'chunks': []}
+    if os.path.exists(plan_path):
+        with open(plan_path, encoding='utf-8') as file:
+            plan = json.load(file)
+
+    planned = {user for chunk in plan['chunks'] for user, _ in chunk}
+    # Absolute export paths, so a run resumed from another working directory finds them
+    new_users = [[user, path] for user, path in discover_exports(os.path.abspath(root)) if user not in planned]
+    for start in range(0, len(new_users), users_per_chunk):
+        plan['chunks'].append(new_users[start:start + users_per_chunk])
+
+    tmp_path = plan_path + ".tmp"
+    _write_json(tmp_path, plan)
+    os.replace(tmp_path, plan_path)
+    return plan
+
+
+def merge_parts(output_dir):
+    """
+    Summary: concatenates every part into one table per result under <output>/results.
+    One table is merged at a time and text columns are joined as categoricals.
+    """
+    parts_dir = os.path.join(output_dir, "parts")
+    parts = sorted(name for name in os.listdir(parts_dir) if not name.endswith(".tmp"))
+    results_dir = os.path.join(output_dir, "results")
+    tmp_dir = results_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    for table in TABLES:
+        frames = [load_table(os.path.join(parts_dir, part, table)) for part in parts
+                  if os.path.exists(os.path.join(parts_dir, part, table, "meta.json"))]
+        if not frames:
+            continue
+        merged = {}
+        for column in frames[0].columns:
+            if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+                merged[column] = union_categoricals([frame[column] for frame in frames])
+            else:
+                merged[column] = np.concatenate([frame[column].to_numpy() for frame in frames])
+        save_table(pd.DataFrame(merged, copy=False), os.path.join(tmp_dir, table))
+        del frames, merged
+
+    errors = []
+    for part in parts:
+        with open(os.path.join(parts_dir, part, "errors.json"), encoding='utf-8') as file:
+            errors += json.load(file)
+    _write_json(os.path.join(tmp_dir, "errors.json"), errors)
+
+    shutil.rmtree(results_dir, ignore_errors=True)
+    os.replace(tmp_dir, results_dir)
+    return errors
+
+
+def run_batch(root, output_dir, workers=MAX_WORKERS, top_n=TOP_N, users_per_chunk=USERS_PER_CHUNK, log=print):
+    """
+    Summary: analyzes every user under root into output_dir, skipping chunks finished
+    by an earlier run, and returns the errors of users that could not be analyzed
+    """
+    os.makedirs(os.path.join(output_dir, "parts"), exist_ok=True)
+    plan = load_plan(root, output_dir, users_per_chunk)
+    pending = [chunk_id for chunk_id in range(len(plan['chunks']))
+               if not os.path.exists(_part_path(output_dir, chunk_id))]
+    log(f"{len(plan['chunks']) - len(pending)} of {len(plan['chunks'])} chunks already done")
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 max_tasks_per_child=CHUNKS_PER_WORKER) as pool:
+            futures = [pool.submit(analyze_chunk, chunk_id, plan['chunks'][chunk_id], output_dir, top_n)
+                       for chunk_id in pending]
+            for done, future in enumerate(as_completed(futures), start=1):
+                chunk_id, analyzed, errors = future.result()
+                log(f"[{done}/{len(pending)}] chunk {chunk_id}: {analyzed} users, {len(errors)} failed")
+
+    return merge_parts(output_dir)
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a directory of Spotify streaming history exports, one per user.")
+    parser.add_argument("exports", help="directory with one export (directory, zip or JSON file) per user")
+    parser.add_argument("-o", "--output", default="batch_results", help="output directory (default: batch_results)")
+    parser.add_argument("-j", "--workers", type=int, default=MAX_WORKERS, help="worker processes")
+    parser.add_argument("--top", type=int, default=TOP_N, help="top artists and tracks kept per user")
+    parser.add_argument("--chunk-size", type=int, default=USERS_PER_CHUNK, help="users per pool task")
+    parser.add_argument("--restart", action="store_true", help="discard results of an earlier run")
+    args = parser.parse_args(argv)
+
+    if args.restart:
+        shutil.rmtree(args.output, ignore_errors=True)
+    errors = run_batch(args.exports, args.output, args.workers, args.top, args.chunk_size)
+    for error in errors:
+        print(f"Error: {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
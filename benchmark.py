@@ -0,0 +1,368 @@
+"""
+Benchmarks of the data pipeline on synthetic data of any size.
+
+    python benchmark.py --sizes 1e4 1e5 1e6
+    python benchmark.py --compare bench_results/old.json bench_results/new.json
+
+Catalogs shaped like songs_normalize.csv and StreamingHistory exports are generated
+once per size and seed into --data-dir. Every stage is timed (best of --repeat runs)
+and then run once more under tracemalloc for its peak Python/NumPy allocation.
+Results are written as JSON tagged with the git commit, so two runs can be compared.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+DATA_DIR = ".bench_data"
+RESULTS_DIR = "bench_results"
+DEFAULT_SIZES = [10**4, 10**5, 10**6]
+REPEAT = 3
+SEED = 0
+CSV_CHUNK_ROWS = 10**6
+SHARD_ROWS = 10_000
+YEAR_MINUTES = 365 * 24 * 60
+# The original per-row implementations are only run up to this size
+BASELINE_MAX_ROWS = 10**6
+# Seed songs per batched similar-songs query
+SIMILARITY_SEEDS = 256
+
+GENRES = [
+    ("pop", 428), ("hip hop, pop", 277), ("hip hop, pop, R&B", 244), ("pop, Dance/Electronic", 221),
+    ("pop, R&B", 178), ("hip hop", 124), ("hip hop, pop, Dance/Electronic", 78), ("rock", 58),
+    ("rock, pop", 43), ("Dance/Electronic", 41), ("rock, metal", 38), ("pop, latin", 28),
+    ("R&B", 13), ("country", 12), ("set()", 22), ("Folk/Acoustic, pop", 10), ("pop, rock, metal", 10),
+]
+
+
+# --- SYNTHETIC DATA ---
+def _zipf_codes(rng, n, size):
+    # Few artists/tracks get most of the rows, like real catalogs and listening logs
+    return (rng.zipf(1.3, n) - 1) % size
+
+
+def generate_catalog(n, path, seed=SEED):
+    """
+    Summary: writes an n-row songs catalog with the columns and value ranges of
+    songs_normalize.csv, in chunks so memory stays flat for large n
+    """
+    rng = np.random.default_rng(seed)
+    n_artists = max(n // 3, 10)
+    genres = np.array([genre for genre, _ in GENRES], dtype=object)
+    weights = np.array([weight for _, weight in GENRES], dtype=np.float64)
+    tmp_path = path + ".tmp"
+    for start in range(0, n, CSV_CHUNK_ROWS):
+        rows = min(CSV_CHUNK_ROWS, n - start)
+        chunk = pd.DataFrame({
+            'artist': np.char.add("Artist ", _zipf_codes(rng, rows, n_artists).astype(str)),
+            'song': np.char.add("Song ", np.arange(start, start + rows).astype(str)),
+            'duration_ms': rng.integers(113_000, 484_146, rows),
+            'explicit': rng.random(rows) < 0.28,
+            'year': rng.integers(1998, 2021, rows),
+            'popularity': rng.integers(0, 90, rows),
+            'danceability': rng.uniform(0.129, 0.975, rows).round(3),
+            'energy': rng.uniform(0.0549, 0.999, rows).round(3),
+            'key': rng.integers(0, 12, rows),
+            'loudness': rng.uniform(-20.5, -0.276, rows).round(3),
+            'mode': rng.integers(0, 2, rows),
+            'speechiness': rng.uniform(0.0232, 0.576, rows).round(4),
+            'acousticness': rng.uniform(0.0, 0.976, rows).round(4),
+            'instrumentalness': rng.exponential(0.02, rows).clip(0, 0.985).round(5),
+            'liveness': rng.uniform(0.0215, 0.853, rows).round(4),
+            'valence': rng.uniform(0.0381, 0.973, rows).round(3),
+            'tempo': rng.uniform(60.0, 210.0, rows).round(3),
+            'genre': genres[rng.choice(len(genres), rows, p=weights / weights.sum())],
+        })
+        chunk.to_csv(tmp_path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+    os.replace(tmp_path, path)
+
+
+def generate_history(n, path, seed=SEED):
+    """
+    Summary: writes an n-play export as numbered StreamingHistory_music_N.json shards of
+    SHARD_ROWS plays, over one year of minutes in time order
+    """
+    rng = np.random.default_rng(seed + 1)
+    n_tracks = max(n // 20, 10)
+    n_artists = max(n_tracks // 8, 5)
+    track_artist = _zipf_codes(rng, n_tracks, n_artists)
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    start = np.datetime64('2024-01-01T00:00', 'm')
+    for shard, first in enumerate(range(0, n, SHARD_ROWS)):
+        rows = min(SHARD_ROWS, n - first)
+        # Each shard covers its share of the year, so plays stay in time order across shards
+        span = max(YEAR_MINUTES * rows // n, 1)
+        minutes = YEAR_MINUTES * first // n + np.sort(rng.integers(0, span, rows))
+        end_times = np.datetime_as_string(start + minutes, unit='m')
+        tracks = _zipf_codes(rng, rows, n_tracks)
+        ms_played = rng.integers(0, 360_000, rows)
+        records = [{
+            'endTime': str(end_time).replace('T', ' '),
+            'artistName': f"Artist {track_artist[track]}",
+            'trackName': f"Track {track}",
+            'msPlayed': int(ms),
+        } for end_time, track, ms in zip(end_times, tracks, ms_played)]
+        with open(os.path.join(tmp_path, f"StreamingHistory_music_{shard}.json"), 'w', encoding='utf-8') as file:
+            json.dump(records, file, indent=2, ensure_ascii=False)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def ensure_data(n, data_dir=DATA_DIR, seed=SEED):
+    """
+    Summary: (catalog CSV, history directory) of size n, generated on first use
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    csv_path = os.path.join(data_dir, f"catalog_{n}_{seed}.csv")
+    history_path = os.path.join(data_dir, f"history_{n}_{seed}")
+    if not os.path.exists(csv_path):
+        generate_catalog(n, csv_path, seed)
+    if not os.path.exists(history_path):
+        generate_history(n, history_path, seed)
+    return csv_path, history_path
+
+
+# --- BASELINES: the per-row implementations the pipeline replaced ---
+def baseline_genre_counts(df):
+    genres = df['genre'].astype(str).str.replace(r"[\[\]']", "", regex=True).str.strip().str.split(', ')
+    return df.assign(genre=genres).explode('genre')['genre'].value_counts()
+
+
+def baseline_period_genre_counts(df, periods):
+    from catalog_index import parse_period
+    counts = []
+    for period in periods:
+        start, end = parse_period(period)
+        counts.append(baseline_genre_counts(df[(df['year'] >= start) & (df['year'] < end)]))
+    return counts
+
+
+def baseline_artist_filter(df, names):
+    return [df[df['artist'].str.lower() == name.lower()] for name in names]
+
+
+def baseline_artist_totals(records):
+    totals = {}
+    for entry in records:
+        artist = entry['artistName']
+        if artist in totals:
+            totals[artist] += entry['msPlayed']
+        else:
+            totals[artist] = entry['msPlayed']
+    return totals
+
+
+def _read_records(history_path):
+    records = []
+    for name in sorted(os.listdir(history_path)):
+        with open(os.path.join(history_path, name), encoding='utf-8') as file:
+            records += json.load(file)
+    return records
+
+
+# --- STAGES ---
+def catalog_stages(n, csv_path):
+    """
+    Summary: (name, setup, run) of every catalog stage. setup runs untimed and returns
+    the arguments of run.
+    """
+    from catalog_cache import CACHE_DIR, load_catalog, open_cache, explode_genres, read_catalog_csv
+    from catalog_index import CatalogIndex
+    from density import PairHistograms
+    from probability import ProbabilityTables
+    from similarity import SimilarityIndex
+    from genre_cube import GenreYearCube
+    from render_cache import figure_to_image
+    from catalog_charts import DASHBOARD_CHARTS, DASHBOARD_CHART_SIZE
+
+    catalog = load_catalog(csv_path)
+    # Cold builds go to their own cache directory so the catalog used by later stages stays mapped
+    cold_dir = CACHE_DIR + "_cold"
+    names = list(catalog.df['artist'].cat.categories[:20])
+    seeds = np.random.default_rng(SEED).integers(0, len(catalog), min(SIMILARITY_SEEDS, len(catalog)))
+    years = catalog.df['year'].to_numpy()
+    periods = [f"{decade}s" for decade in np.unique(years // 10 * 10)] + [str(year) for year in np.unique(years)]
+
+    def cold_cache():
+        shutil.rmtree(os.path.join(os.path.dirname(csv_path), cold_dir), ignore_errors=True)
+        return (csv_path, cold_dir)
+
+    def draw_dashboard(catalog):
+        for draw in DASHBOARD_CHARTS.values():
+            figure_to_image(draw(catalog), DASHBOARD_CHART_SIZE)
+
+    stages = [
+        ("catalog.read_csv", lambda: (csv_path,), pd.read_csv),
+        ("catalog.read_csv_schema", lambda: (csv_path,), read_catalog_csv),
+        ("catalog.build_cache", cold_cache, load_catalog),
+        ("catalog.open_cache", lambda: (catalog.cache_path,), open_cache),
+        ("catalog.split_genres", lambda: (catalog.df['genre'],), explode_genres),
+        ("catalog.genre_counts", lambda: (catalog.genre_cube,), GenreYearCube.genre_counts),
+        ("catalog.build_index", lambda: (catalog,), CatalogIndex),
+        ("catalog.artist_filter", lambda: (catalog.index, names),
+         lambda index, names: [index.search_artist_rows(name) for name in names]),
+        ("catalog.probability_tables", lambda: (catalog,), ProbabilityTables),
+        ("catalog.pair_histograms", lambda: (catalog.df,), PairHistograms.build),
+        ("catalog.dashboard_charts", lambda: (catalog,), draw_dashboard),
+        ("catalog.similarity_index", lambda: (catalog,), SimilarityIndex),
+        ("catalog.similar_songs", lambda: (SimilarityIndex(catalog), seeds), lambda index, rows: index.similar_to_rows(rows)),
+        ("catalog.genre_cube", lambda: (catalog,), GenreYearCube),
+        ("catalog.period_genre_counts", lambda: (GenreYearCube(catalog), periods),
+         lambda cube, periods: [cube.period_counts(period) for period in periods]),
+    ]
+    if n <= BASELINE_MAX_ROWS:
+        df = pd.read_csv(csv_path)
+        stages += [
+            ("baseline.genre_explode", lambda: (df,), baseline_genre_counts),
+            ("baseline.artist_filter", lambda: (df, names), baseline_artist_filter),
+            ("baseline.period_genre_counts", lambda: (df, periods), baseline_period_genre_counts),
+        ]
+    return stages
+
+
+def history_stages(n, history_path, data_dir):
+    from history_loader import load_history
+    from aggregation import PlayAggregates
+    from history_store import HistoryStore
+    from history_charts import draw_artist_totals
+    from render_cache import figure_to_image
+    from topk import top_k
+    from temporal import ListeningTimeline
+
+    history = load_history(history_path)
+    totals = PlayAggregates(history).artist_totals()
+    store_path = os.path.join(data_dir, "history_store")
+
+    def empty_store():
+        shutil.rmtree(store_path, ignore_errors=True)
+        return (HistoryStore(store_path), history)
+
+    stages = [
+        ("history.load", lambda: (history_path,), load_history),
+        ("history.artist_totals", lambda: (history,), lambda history: PlayAggregates(history).artist_totals()),
+        ("history.track_totals", lambda: (history,), lambda history: PlayAggregates(history).track_totals()),
+        ("history.top_k", lambda: (totals['msPlayed'], 10), top_k),
+        ("history.timeline", lambda: (history,), lambda history: ListeningTimeline(history).hour_of_week()),
+        ("history.sessions", lambda: (ListeningTimeline(history),), lambda timeline: timeline.sessions()),
+        ("history.store_import", empty_store, lambda store, history: store.import_history(history)),
+        ("history.render_top_artists", lambda: (totals,), lambda totals: figure_to_image(draw_artist_totals(totals), (800, 600))),
+    ]
+    if n <= BASELINE_MAX_ROWS:
+        records = _read_records(history_path)
+        stages.append(("baseline.artist_totals_dict_loop", lambda: (records,), baseline_artist_totals))
+    return stages
+
+
+def measure(setup, run, repeat=REPEAT):
+    """
+    Summary: best wall and CPU seconds over repeat runs, then the tracemalloc peak of one more run
+    """
+    best_wall = best_cpu = float('inf')
+    for _ in range(repeat):
+        args = setup()
+        gc.collect()
+        wall, cpu = time.perf_counter(), time.process_time()
+        run(*args)
+        best_wall = min(best_wall, time.perf_counter() - wall)
+        best_cpu = min(best_cpu, time.process_time() - cpu)
+
+    args = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'wall_s': best_wall, 'cpu_s': best_cpu, 'peak_bytes': peak}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes, repeat=REPEAT, data_dir=DATA_DIR, seed=SEED, only=None, log=print):
+    import matplotlib
+    matplotlib.use('Agg')
+
+    results = []
+    for n in sizes:
+        log(f"== {n:,} rows ==")
+        csv_path, history_path = ensure_data(n, data_dir, seed)
+        for name, setup, run in catalog_stages(n, csv_path) + history_stages(n, history_path, data_dir):
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            result = {'stage': name, 'rows': n, **measure(setup, run, repeat)}
+            results.append(result)
+            log(f"{name:<36} {result['wall_s'] * 1000:>10.1f} ms {result['cpu_s'] * 1000:>10.1f} ms cpu "
+                f"{result['peak_bytes'] / 2**20:>9.1f} MiB")
+    return {
+        'commit': git_commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'seed': seed,
+        'results': results,
+    }
+
+
+def compare(old_path, new_path):
+    """
+    Summary: prints new/old wall time and peak memory ratios for every stage and size in both files
+    """
+    with open(old_path, encoding='utf-8') as file:
+        old = {(r['stage'], r['rows']): r for r in json.load(file)['results']}
+    with open(new_path, encoding='utf-8') as file:
+        new = {(r['stage'], r['rows']): r for r in json.load(file)['results']}
+    print(f"{'stage':<36} {'rows':>10} {'time':>8} {'memory':>8}")
+    for key in sorted(old.keys() & new.keys(), key=lambda key: (key[1], key[0])):
+        time_ratio = new[key]['wall_s'] / old[key]['wall_s'] if old[key]['wall_s'] else float('nan')
+        memory_ratio = new[key]['peak_bytes'] / old[key]['peak_bytes'] if old[key]['peak_bytes'] else float('nan')
+        print(f"{key[0]:<36} {key[1]:>10,} {time_ratio:>7.2f}x {memory_ratio:>7.2f}x")
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the catalog and listening history pipeline.")
+    parser.add_argument("--sizes", nargs="+", type=float, default=DEFAULT_SIZES, help="rows per dataset, e.g. 1e4 1e7")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timed runs per stage, the best is kept")
+    parser.add_argument("--stages", nargs="+", help="only run stages starting with these prefixes")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="where generated datasets are kept between runs")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("-o", "--output", help=f"results JSON (default: {RESULTS_DIR}/<time>_<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two results files and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    report = run_benchmarks([int(n) for n in args.sizes], args.repeat, args.data_dir, args.seed, args.stages)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now():%Y%m%d_%H%M%S}_{report['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
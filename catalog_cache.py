@@ -0,0 +1,280 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from functools import cached_property
+import numpy as np
+import pandas as pd
+from catalog_index import CatalogIndex
+from density import PairHistograms
+from genre_cube import GenreYearCube
+from history_join import CatalogMatcher
+from probability import ProbabilityTables
+from similarity import SimilarityIndex
+from instrumentation import span
+
+
+CACHE_DIR = ".catalog_cache"
+CACHE_VERSION = 3
+
+# Storage type of every known catalog column. Text columns are categoricals, stored as
+# the smallest integer codes that fit plus a list of names. Columns not listed keep
+# the type pandas infers for them.
+CATALOG_SCHEMA = {
+    'artist': 'category',
+    'song': 'category',
+    'genre': 'category',
+    'duration_ms': 'int32',
+    'explicit': 'bool',
+    'year': 'int16',
+    'popularity': 'int16',
+    'key': 'int16',
+    'mode': 'int8',
+    'danceability': 'float32',
+    'energy': 'float32',
+    'loudness': 'float32',
+    'speechiness': 'float32',
+    'acousticness': 'float32',
+    'instrumentalness': 'float32',
+    'liveness': 'float32',
+    'valence': 'float32',
+    'tempo': 'float32',
+}
+CATEGORICAL_COLUMNS = [column for column, dtype in CATALOG_SCHEMA.items() if dtype == 'category']
+
+
+def file_sha1(path, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def smallest_code_dtype(size):
+    for dtype in (np.int8, np.int16, np.int32):
+        if size < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def read_catalog_csv(csv_path, schema=CATALOG_SCHEMA):
+    """
+    Summary: parses the catalog CSV straight into the schema types, so text is never
+    held as one Python string per row. Falls back to inferred types for a file whose
+    values do not fit the schema (missing numbers, out-of-range values).
+    """
+    try:
+        return pd.read_csv(csv_path, dtype=schema)
+    except (ValueError, OverflowError):
+        return pd.read_csv(csv_path)
+
+
+def split_genres(genre):
+    """
+    Summary: turns the raw genre column ("['pop', 'rock']" or "pop, rock")
+    into one list of genre names per song
+    """
+    genre = genre.astype(str).str.replace(r"[\[\]']", "", regex=True).str.strip()
+    return genre.str.split(', ')
+
+
+def explode_genres(genre):
+    """
+    Summary: one genre name per (song, genre) pair, indexed by row id. A categorical
+    column is split once per distinct genre string instead of once per song.
+    """
+    if not isinstance(genre.dtype, pd.CategoricalDtype) or genre.isna().any():
+        return split_genres(genre).explode()
+    per_category = split_genres(pd.Series(genre.cat.categories)).explode()
+    pairs = pd.DataFrame({'code': per_category.index, 'genre': per_category.to_numpy()})
+    rows = pd.DataFrame({'row': np.arange(len(genre)), 'code': genre.cat.codes.to_numpy()})
+    exploded = rows.merge(pairs, on='code', how='left')
+    return pd.Series(exploded['genre'].to_numpy(), index=pd.Index(exploded['row'].to_numpy()), name=genre.name)
+
+
+class Catalog:
+    """
+    Summary: the songs catalog loaded from the columnar cache.
+    df holds every CSV column (text columns as categoricals), genre_rows/genre_codes
+    is the pre-exploded genre table: one (row id, genre code) pair per genre of a song.
+    fingerprint is the sha1 of the source CSV. The lookup structures derived from
+    the catalog are built on first use and live as long as the Catalog does.
+    """
+
+    def __init__(self, df, genre_rows, genre_codes, genre_names, fingerprint, cache_path=None):
+        self.df = df
+        self.genre_rows = genre_rows
+        self.genre_codes = genre_codes
+        self.genre_names = genre_names
+        self.fingerprint = fingerprint
+        self.cache_path = cache_path
+
+    def __len__(self):
+        return len(self.df)
+
+    @cached_property
+    def index(self):
+        return CatalogIndex(self)
+
+    @cached_property
+    def pair_histograms(self):
+        return PairHistograms.for_catalog(self)
+
+    @cached_property
+    def probability_tables(self):
+        return ProbabilityTables(self)
+
+    @cached_property
+    def genre_cube(self):
+        return GenreYearCube(self)
+
+    @cached_property
+    def matcher(self):
+        return CatalogMatcher(self)
+
+    @cached_property
+    def similarity_index(self):
+        return SimilarityIndex(self)
+
+def _cache_path(csv_path, cache_dir):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(csv_path)), cache_dir, name)
+
+
+def _read_meta(cache_path):
+    try:
+        with open(os.path.join(cache_path, "meta.json")) as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_json(path, value):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(value, file)
+
+
+def build_cache(csv_path, cache_path, sha1=None):
+    """
+    Summary: parses the CSV once and writes one .npy file per column plus the
+    exploded genre table. The cache is written next to the old one and swapped in.
+    """
+    with span("catalog.read_csv"):
+        df = read_catalog_csv(csv_path)
+    stat = os.stat(csv_path)
+    tmp_path = cache_path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    columns = {}
+    for column in df.columns:
+        # Anything but numbers and booleans (object, pandas 3 str, datetimes) is stored as codes,
+        # np.load cannot memory-map an object array
+        dtype = df[column].dtype
+        if column in CATEGORICAL_COLUMNS or not (pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)):
+            values = df[column]
+            categories = values.array if isinstance(values.dtype, pd.CategoricalDtype) and not values.isna().any() \
+                else pd.Categorical(values.astype(str))
+            codes = categories.codes.astype(smallest_code_dtype(len(categories.categories)))
+            np.save(os.path.join(tmp_path, f"{column}.npy"), codes)
+            _write_json(os.path.join(tmp_path, f"{column}.names.json"), list(categories.categories))
+            columns[column] = 'category'
+        else:
+            values = df[column].to_numpy()
+            np.save(os.path.join(tmp_path, f"{column}.npy"), values)
+            columns[column] = str(values.dtype)
+
+    with span("catalog.split_genres"):
+        genres = explode_genres(df['genre'])
+    # The sparse genre membership: one (row id, genre code) pair per genre of a song
+    genre_categories = pd.Categorical(genres)
+    np.save(os.path.join(tmp_path, "genre_rows.npy"), genres.index.to_numpy(dtype=smallest_code_dtype(len(df))))
+    np.save(os.path.join(tmp_path, "genre_codes.npy"),
+            genre_categories.codes.astype(smallest_code_dtype(len(genre_categories.categories))))
+    _write_json(os.path.join(tmp_path, "genre_codes.names.json"), list(genre_categories.categories))
+
+    meta = {
+        'version': CACHE_VERSION,
+        'source': os.path.abspath(csv_path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha1': sha1 or file_sha1(csv_path),
+        'columns': columns,
+    }
+    _write_json(os.path.join(tmp_path, "meta.json"), meta)
+
+    shutil.rmtree(cache_path, ignore_errors=True)
+    os.replace(tmp_path, cache_path)
+    return meta
+
+
+def _is_fresh(csv_path, cache_path, meta):
+    """
+    Summary: a cache is fresh when the CSV mtime and size match, or, when only
+    the mtime moved (copy, checkout, touch), when its sha1 still matches
+    """
+    if meta is None or meta.get('version') != CACHE_VERSION:
+        return False, None
+    stat = os.stat(csv_path)
+    if stat.st_mtime_ns == meta['mtime_ns'] and stat.st_size == meta['size']:
+        return True, None
+    sha1 = file_sha1(csv_path)
+    if sha1 != meta['sha1']:
+        return False, sha1
+    meta['mtime_ns'] = stat.st_mtime_ns
+    meta['size'] = stat.st_size
+    _write_json(os.path.join(cache_path, "meta.json"), meta)
+    return True, sha1
+
+
+def open_cache(cache_path, meta=None):
+    """
+    Summary: memory-maps a built cache into a Catalog without parsing anything
+    """
+    meta = meta or _read_meta(cache_path)
+
+    def load(name):
+        return np.load(os.path.join(cache_path, f"{name}.npy"), mmap_mode='r')
+
+    def names(name):
+        with open(os.path.join(cache_path, f"{name}.names.json"), encoding='utf-8') as file:
+            return json.load(file)
+
+    data = {}
+    for column, dtype in meta['columns'].items():
+        if dtype == 'category':
+            data[column] = pd.Categorical.from_codes(load(column), names(column))
+        else:
+            data[column] = load(column)
+    df = pd.DataFrame(data, copy=False)
+
+    return Catalog(df, load("genre_rows"), load("genre_codes"), np.array(names('genre_codes'), dtype=object),
+                   meta['sha1'], cache_path)
+
+
+_lock = threading.Lock()
+# cache path -> the Catalog last opened from it, so every caller shares its lookup structures
+_opened = {}
+
+
+def load_catalog(csv_path, cache_dir=CACHE_DIR):
+    """
+    Summary: returns the Catalog for csv_path, building the cache on the first
+    run or when the CSV changed and memory-mapping it otherwise. While the CSV is
+    unchanged, every call returns the same Catalog.
+    """
+    cache_path = _cache_path(csv_path, cache_dir)
+    with _lock:
+        meta = _read_meta(cache_path)
+        fresh, sha1 = _is_fresh(csv_path, cache_path, meta)
+        if not fresh:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with span("catalog.build_cache"):
+                meta = build_cache(csv_path, cache_path, sha1)
+        catalog = _opened.get(cache_path)
+        if not fresh or catalog is None or catalog.fingerprint != meta['sha1']:
+            with span("catalog.open_cache"):
+                catalog = _opened[cache_path] = open_cache(cache_path, meta)
+        return catalog
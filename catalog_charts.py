@@ -0,0 +1,143 @@
+"""
+Matplotlib charts of the songs catalog. Every draw function takes the Catalog first
+and returns a Figure; nothing here needs Tk, so charts can be drawn in pool processes
+and by the headless report.
+"""
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.colors import LogNorm
+from matplotlib.ticker import MaxNLocator
+import seaborn as sns
+from density import DENSITY_THRESHOLD
+from catalog_index import parse_period
+from topk import top_k
+
+DASHBOARD_CHART_SIZE = (380, 280)
+TREND_GENRES = 6
+# Years with fewer songs than this are left out of the trend lines, their shares are mostly noise
+TREND_MIN_SONGS = 10
+
+
+def mean_popularity_by(catalog, column):
+    """
+    Summary: mean popularity per category of a categorical column, one bincount over the codes
+    """
+    values = catalog.df[column]
+    codes = values.cat.codes.to_numpy()
+    n = len(values.cat.categories)
+    counts = np.bincount(codes, minlength=n)
+    totals = np.bincount(codes, weights=catalog.df['popularity'].to_numpy(dtype=np.float64), minlength=n)
+    present = counts > 0
+    return pd.Series(totals[present] / counts[present], index=values.cat.categories[present], name='popularity')
+
+
+def draw_top_artists_chart(catalog):
+    top_artists = top_k(mean_popularity_by(catalog, 'artist'), 5)
+    fig = Figure(figsize=(4, 4))
+    ax = fig.add_subplot()
+    top_artists.plot(kind='pie', autopct='%1.1f%%', startangle=140, colors=sns.color_palette('pastel'), ax=ax)
+    ax.set_ylabel('')
+    ax.set_title('Top Artists')
+    fig.tight_layout()
+    return fig
+
+
+def draw_top_genres_chart(catalog):
+    top_genres = top_k(catalog.genre_cube.genre_counts(), 5)
+    fig = Figure(figsize=(4, 4))
+    ax = fig.add_subplot()
+    top_genres.plot(kind='bar', color=sns.color_palette('muted'), ax=ax)
+    ax.set_title('Top Genres')
+    ax.set_ylabel('Songs')
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    return fig
+
+
+def draw_listening_timeline_chart(catalog):
+    year_counts = catalog.df['year'].value_counts().sort_index()
+    fig = Figure(figsize=(4, 4))
+    ax = fig.add_subplot()
+    sns.lineplot(x=year_counts.index, y=year_counts.values, marker="o", ax=ax)
+    ax.set_title('Listening Timeline')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Number of Songs')
+    ax.grid(True)
+    fig.tight_layout()
+    return fig
+
+
+def draw_top_tracks_chart(catalog):
+    top_tracks = top_k(mean_popularity_by(catalog, 'song'), 5)
+    fig = Figure(figsize=(4, 4))
+    ax = fig.add_subplot()
+    top_tracks.plot(kind='barh', color=sns.color_palette('pastel'), ax=ax)
+    ax.set_title('Top Tracks')
+    ax.set_xlabel('Popularity')
+    ax.invert_yaxis()
+    fig.tight_layout()
+    return fig
+
+
+DASHBOARD_CHARTS = {
+    "top_artists_chart": draw_top_artists_chart,
+    "top_genres_chart": draw_top_genres_chart,
+    "listening_timeline": draw_listening_timeline_chart,
+    "top_tracks_chart": draw_top_tracks_chart,
+}
+
+
+def draw_top_genres_explore(catalog, period_input):
+    start, end = parse_period(period_input)
+    top_genres = top_k(catalog.genre_cube.genre_counts(start, end), 10)
+
+    fig = Figure(figsize=(8, 6))
+    ax = fig.add_subplot()
+    top_genres.plot(kind='bar', color=sns.color_palette('deep'), ax=ax)
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.set_title(f"Top Genres in {period_input}")
+    ax.set_ylabel("Number of Songs")
+    fig.tight_layout()
+    return fig
+
+
+def draw_genre_trends(catalog, top_n=TREND_GENRES):
+    """
+    Summary: share of each year's songs tagged with each of the top_n genres of the whole catalog,
+    one line per genre
+    """
+    cube = catalog.genre_cube
+    genres = top_k(cube.genre_counts(), top_n).index
+    trend = cube.trend(genres, share=True)
+    trend = trend[cube.year_songs().to_numpy() >= TREND_MIN_SONGS]
+
+    fig = Figure(figsize=(8, 6))
+    ax = fig.add_subplot()
+    for genre, color in zip(genres, sns.color_palette('deep', len(genres))):
+        ax.plot(trend.index, trend[genre].to_numpy() * 100, marker='o', markersize=3, color=color, label=genre)
+    ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.set_title("Genre Trends by Year")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("% of the Year's Songs")
+    ax.legend(fontsize=8)
+    fig.tight_layout()
+    return fig
+
+
+def draw_relationship_plot(catalog, var1, var2):
+    fig = Figure(figsize=(8, 6))
+    ax = fig.add_subplot()
+    if len(catalog) > DENSITY_THRESHOLD:
+        # Too many points to scatter, draw the precomputed 2D histogram instead
+        x_edges, y_edges, counts = catalog.pair_histograms.get(var1, var2)
+        mesh = ax.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts.T, 0), norm=LogNorm(), cmap='viridis')
+        fig.colorbar(mesh, ax=ax, label='Songs')
+    else:
+        sns.scatterplot(data=catalog.df, x=var1, y=var2, alpha=0.6, ax=ax)
+    ax.set_title(f"Relationship Between {var1.capitalize()} and {var2.capitalize()}")
+    ax.set_xlabel(var1.capitalize())
+    ax.set_ylabel(var2.capitalize())
+    ax.grid(True)
+    fig.tight_layout()
+    return fig
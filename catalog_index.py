@@ -0,0 +1,126 @@
+import numpy as np
+
+
+def parse_period(period_input):
+    """
+    Summary: turns "2015" into (2015, 2016), "2010s" into (2010, 2020) and the
+    inclusive range "2005-2012" into (2005, 2013), raises ValueError for anything else
+    """
+    period_input = period_input.strip()
+    first, dash, last = period_input.partition('-')
+    if dash and first:
+        start, end = int(first), int(last) + 1
+        if start >= end:
+            raise ValueError(f"Empty year range: {period_input}")
+        return start, end
+    if period_input.endswith('s'):
+        decade = int(period_input[:-1])
+        return decade, decade + 10
+    year = int(period_input)
+    return year, year + 1
+
+
+def _group(keys, size):
+    """
+    Summary: groups positions by key. Returns (order, offsets) so the positions
+    with key k are order[offsets[k]:offsets[k + 1]], in ascending order.
+    """
+    order = np.argsort(keys, kind='stable')
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=offsets[1:])
+    return order, offsets
+
+
+def _ranges(offsets, keys):
+    """
+    Summary: concatenates the position ranges offsets[k]:offsets[k + 1] for
+    every k in keys without a Python loop
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    starts = offsets[keys]
+    lengths = offsets[keys + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    shift = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return shift + np.arange(total)
+
+
+class CatalogIndex:
+    """
+    Summary: inverted indexes over a Catalog, built once at load time.
+    artist and song: case-folded name -> row ids, plus each row's slice of the genre
+    table. Lookups cost O(result) instead of a scan over the catalog. Period and genre
+    counts are answered by the catalog's GenreYearCube instead.
+    """
+
+    def __init__(self, catalog):
+        df = catalog.df
+
+        artists = df['artist'].cat
+        self._artist_codes = {}
+        for code, name in enumerate(artists.categories):
+            self._artist_codes.setdefault(str(name).casefold(), []).append(code)
+        self._artist_order, self._artist_offsets = _group(artists.codes.to_numpy(), len(artists.categories))
+
+        songs = df['song'].cat
+        self._song_codes = {}
+        for code, name in enumerate(songs.categories):
+            self._song_codes.setdefault(str(name).casefold(), []).append(code)
+        self._song_order, self._song_offsets = _group(songs.codes.to_numpy(), len(songs.categories))
+
+        self._genre_table_rows = catalog.genre_rows
+        self._genre_table_codes = catalog.genre_codes
+
+        # genre_rows is grouped by song, so each row's genres are one slice of the table
+        self._row_genre_offsets = np.searchsorted(catalog.genre_rows, np.arange(len(df) + 1))
+
+    def artist_codes(self, name):
+        """
+        Summary: category codes of the artist, several when the name appears with different casing
+        """
+        return self._artist_codes.get(name.strip().casefold(), [])
+
+    def artist_rows(self, name):
+        """
+        Summary: row ids of every song by the artist, case insensitive
+        """
+        codes = self.artist_codes(name)
+        rows = self._artist_order[_ranges(self._artist_offsets, codes)]
+        if len(codes) > 1:
+            rows.sort()
+        return rows
+
+    def search_artist_rows(self, text):
+        """
+        Summary: rows of the artist named text, or when no artist has exactly that
+        name, rows of every artist whose name contains it
+        """
+        rows = self.artist_rows(text)
+        if len(rows):
+            return rows
+        text = text.strip().casefold()
+        codes = [code for name, codes in self._artist_codes.items() if text in name for code in codes]
+        rows = self._artist_order[_ranges(self._artist_offsets, codes)]
+        rows.sort()
+        return rows
+
+    def search_song_rows(self, text):
+        """
+        Summary: rows of the songs titled text, or when no song has exactly that
+        title, rows of every song whose title contains it
+        """
+        text = text.strip().casefold()
+        codes = self._song_codes.get(text)
+        if codes is None:
+            codes = [code for name, codes in self._song_codes.items() if text in name for code in codes]
+        rows = self._song_order[_ranges(self._song_offsets, codes)]
+        rows.sort()
+        return rows
+
+    def row_genre_pairs(self, rows):
+        """
+        Summary: (row ids, genre codes) of the given rows, one entry per (row, genre) pair
+        """
+        positions = _ranges(self._row_genre_offsets, rows)
+        return self._genre_table_rows[positions], self._genre_table_codes[positions]
@@ -0,0 +1,95 @@
+import importlib
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+import matplotlib
+from catalog_cache import open_cache
+from render_cache import chart_cache, figure_to_image
+
+
+MAX_WORKERS = 4
+
+_pool = None
+_worker_catalogs = {}
+
+
+def worker_catalog(cache_path):
+    """
+    Summary: the catalog inside a pool process. It is memory-mapped from its
+    on-disk cache (once per process), so no DataFrame is pickled across.
+    """
+    catalog = _worker_catalogs.get(cache_path)
+    if catalog is None:
+        catalog = _worker_catalogs[cache_path] = open_cache(cache_path)
+    return catalog
+
+
+def _render_in_worker(cache_path, name, size):
+    from catalog_charts import DASHBOARD_CHARTS
+
+    return figure_to_image(DASHBOARD_CHARTS[name](worker_catalog(cache_path)), size)
+
+
+def draw_in_worker(cache_path, module, function, args, size, path=None):
+    """
+    Summary: runs module.function(*args) in a pool process and renders the Figure it returns.
+    With a cache_path the worker's catalog is passed as the first argument. With a path
+    the image is written there as PNG and the path is returned instead of the image.
+    """
+    draw = getattr(importlib.import_module(module), function)
+    if cache_path is not None:
+        args = (worker_catalog(cache_path),) + tuple(args)
+    image = figure_to_image(draw(*args), size)
+    if path is None:
+        return image
+    image.save(path, format='PNG')
+    return path
+
+
+def _init_worker():
+    matplotlib.use('Agg')
+
+
+def _store(cache, key, future):
+    if not future.cancelled() and future.exception() is None:
+        cache.put(key, future.result())
+
+
+def create_pool(max_workers=MAX_WORKERS):
+    # spawn, not fork: the parent process may own a Tk interpreter
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_worker)
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = create_pool()
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def submit_charts(catalog, charts, size, cache=chart_cache):
+    """
+    Summary: starts rendering every chart name in charts at size pixels on the process pool.
+    Returns chart name -> Future of an RGBA image, charts found in the render cache
+    come back as already finished futures.
+    """
+    futures = {}
+    for name in charts:
+        key = cache.key(catalog.fingerprint, name, None, size)
+        image = cache.get(key)
+        if image is not None:
+            future = Future()
+            future.set_result(image)
+        else:
+            future = get_pool().submit(_render_in_worker, catalog.cache_path, name, size)
+            future.add_done_callback(partial(_store, cache, key))
+        futures[name] = future
+    return futures
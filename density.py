@@ -0,0 +1,94 @@
+import os
+import threading
+import numpy as np
+
+
+AUDIO_ATTRIBUTES = [
+    'danceability', 'energy', 'loudness', 'speechiness',
+    'acousticness', 'instrumentalness', 'liveness', 'valence', 'tempo'
+]
+
+# Above this many songs the relationship plot draws a 2D histogram instead of points
+DENSITY_THRESHOLD = 50_000
+BINS = 200
+
+
+class PairHistograms:
+    """
+    Summary: 2D histograms of every pair of audio attributes, BINS x BINS each.
+    Every attribute is binned once, each pair is then one np.bincount over the
+    combined bin codes. Drawing a pair afterwards costs the same at any catalog size.
+    """
+
+    def __init__(self, edges, counts):
+        self.edges = edges
+        self.counts = counts
+
+    @classmethod
+    def build(cls, df, attributes=AUDIO_ATTRIBUTES, bins=BINS):
+        edges = {}
+        codes = {}
+        for attribute in attributes:
+            values = df[attribute].to_numpy(dtype=np.float64)
+            finite = values[np.isfinite(values)]
+            low, high = (finite.min(), finite.max()) if len(finite) else (0.0, 1.0)
+            if high <= low:
+                high = low + 1.0
+            edges[attribute] = np.linspace(low, high, bins + 1)
+            code = ((values - low) / (high - low) * bins).astype(np.int64)
+            codes[attribute] = np.clip(code, 0, bins - 1)
+
+        counts = {}
+        for i, x in enumerate(attributes):
+            for y in attributes[i:]:
+                pair = np.bincount(codes[x] * bins + codes[y], minlength=bins * bins)
+                counts[(x, y)] = pair.reshape(bins, bins).astype(np.int32)
+        return cls(edges, counts)
+
+    def get(self, x, y):
+        """
+        Summary: (x edges, y edges, counts) with counts indexed [x bin, y bin]
+        """
+        if (x, y) in self.counts:
+            return self.edges[x], self.edges[y], self.counts[(x, y)]
+        return self.edges[x], self.edges[y], self.counts[(y, x)].T
+
+    def save(self, path):
+        arrays = {f"edges:{name}": values for name, values in self.edges.items()}
+        arrays.update({f"counts:{x}:{y}": values for (x, y), values in self.counts.items()})
+        # A temp file per writer: report workers build the same histograms side by side
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # Another writer won, its file holds the same histograms
+            os.remove(tmp_path)
+
+    @classmethod
+    def load(cls, path):
+        edges = {}
+        counts = {}
+        with np.load(path) as arrays:
+            for name in arrays.files:
+                kind, _, rest = name.partition(":")
+                if kind == "edges":
+                    edges[rest] = arrays[name]
+                else:
+                    x, y = rest.split(":")
+                    counts[(x, y)] = arrays[name]
+        return cls(edges, counts)
+
+    @classmethod
+    def for_catalog(cls, catalog):
+        """
+        Summary: the histograms of a catalog, built once and stored next to its
+        columnar cache so later runs only load them
+        """
+        path = os.path.join(catalog.cache_path, f"pair_histograms_{BINS}.npz") if catalog.cache_path else None
+        if path and os.path.exists(path):
+            return cls.load(path)
+        histograms = cls.build(catalog.df)
+        if path:
+            histograms.save(path)
+        return histograms
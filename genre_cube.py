@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from catalog_index import parse_period
+
+
+class GenreYearCube:
+    """
+    Summary: songs per (release year, genre), built once from the catalog's
+    (row id, genre code) pair table with a single bincount. Counts are kept as
+    cumulative sums over the year axis, so the genre breakdown of any year, decade
+    or year range is one subtraction of two rows: O(genres), whatever the size of
+    the catalog or of the period.
+    """
+
+    def __init__(self, catalog):
+        years = catalog.df['year'].to_numpy().astype(np.int64)
+        self.genre_names = catalog.genre_names
+        self.n_genres = len(catalog.genre_names)
+        self.first_year = int(years.min()) if len(years) else 0
+        self.n_years = int(years.max()) - self.first_year + 1 if len(years) else 0
+        year_codes = years - self.first_year
+
+        pair_years = year_codes[catalog.genre_rows]
+        counts = np.bincount(pair_years * self.n_genres + catalog.genre_codes,
+                             minlength=self.n_years * self.n_genres).reshape(self.n_years, self.n_genres)
+        self.cumulative = np.zeros((self.n_years + 1, self.n_genres), dtype=np.int64)
+        np.cumsum(counts, axis=0, out=self.cumulative[1:])
+        self.song_cumulative = np.concatenate([[0], np.cumsum(np.bincount(year_codes, minlength=self.n_years))])
+
+    @property
+    def years(self):
+        return np.arange(self.first_year, self.first_year + self.n_years)
+
+    def _year_positions(self, start, end):
+        start = self.first_year if start is None else start
+        end = self.first_year + self.n_years if end is None else end
+        return (int(np.clip(start - self.first_year, 0, self.n_years)),
+                int(np.clip(end - self.first_year, 0, self.n_years)))
+
+    def counts(self, start=None, end=None):
+        """
+        Summary: songs per genre code released in [start, end), the whole catalog by default
+        """
+        lo, hi = self._year_positions(start, end)
+        return self.cumulative[max(hi, lo)] - self.cumulative[lo]
+
+    def songs(self, start=None, end=None):
+        """
+        Summary: number of songs released in [start, end)
+        """
+        lo, hi = self._year_positions(start, end)
+        return int(self.song_cumulative[max(hi, lo)] - self.song_cumulative[lo])
+
+    def year_songs(self):
+        """
+        Summary: number of songs released per year, every year between the first and last included
+        """
+        return pd.Series(np.diff(self.song_cumulative), index=pd.Index(self.years, name='year'), name='songs')
+
+    def genre_counts(self, start=None, end=None):
+        """
+        Summary: songs per genre released in [start, end) as a Series, genres without a song left out
+        """
+        counts = self.counts(start, end)
+        present = counts > 0
+        return pd.Series(counts[present], index=self.genre_names[present], name='count')
+
+    def period_counts(self, period_input):
+        """
+        Summary: genre_counts for a "2015", "2010s" or "2005-2012" style period
+        """
+        return self.genre_counts(*parse_period(period_input))
+
+    def trend(self, genres=None, start=None, end=None, share=False):
+        """
+        Summary: songs per year (rows) and genre (columns) for the years in [start, end).
+        With share, each count is divided by the number of songs released that year.
+        genres limits the columns to the given names, in that order.
+        """
+        lo, hi = self._year_positions(start, end)
+        hi = max(hi, lo)
+        counts = np.diff(self.cumulative[lo:hi + 1], axis=0)
+        names = pd.Index(self.genre_names, name='genre')
+        if genres is not None:
+            codes = names.get_indexer(list(genres))
+            if (codes < 0).any():
+                raise KeyError(f"Unknown genres: {list(np.asarray(genres)[codes < 0])}")
+            counts, names = counts[:, codes], names[codes]
+        table = pd.DataFrame(counts, index=pd.Index(self.years[lo:hi], name='year'), columns=names)
+        if share:
+            songs = np.diff(self.song_cumulative[lo:hi + 1])
+            table = table.div(np.where(songs > 0, songs, 1), axis=0)
+        return table
@@ -0,0 +1,78 @@
+"""
+Matplotlib charts of a listening history. Every draw function returns a Figure and
+needs no Tk, so the charts can be drawn in pool processes and by the headless report.
+"""
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from aggregation import to_hours
+from temporal import WEEKDAYS
+from topk import top_k
+
+
+def draw_artist_totals(totals, top_n = 10):
+    # Convert the ms to hours
+    hours = pd.Series(to_hours(totals['msPlayed'].to_numpy()), index=totals.index)
+    top_hours = top_k(hours, top_n)
+    top_artists = pd.DataFrame({'Artist': top_hours.index, 'HoursListened': top_hours.to_numpy()})
+
+    fig = Figure(figsize=(10, 8))
+    ax = fig.add_subplot()
+    ax.barh(top_artists['Artist'], top_artists['HoursListened'])
+    ax.set_xlabel('Hours Listened')
+    ax.set_ylabel(f'Top {top_n} Listened to Artists by You')
+    ax.invert_yaxis()
+    fig.tight_layout()
+    return fig
+
+
+def draw_listening_patterns(timeline):
+    """
+    Summary: hour-of-week heatmap and weekly hours of a ListeningTimeline, with session and skip stats
+    """
+    ms, _ = timeline.hour_of_week()
+    weekly = timeline.weekly_totals()
+    sessions = timeline.sessions()
+
+    fig = Figure(figsize=(10, 8))
+    heat_ax, week_ax = fig.subplots(2, 1, gridspec_kw={'height_ratios': [3, 2]})
+    mesh = heat_ax.imshow(to_hours(ms), aspect='auto', cmap='Greens')
+    heat_ax.set_yticks(range(7), WEEKDAYS)
+    heat_ax.set_xticks(range(0, 24, 3))
+    heat_ax.set_xlabel('Hour of Day')
+    fig.colorbar(mesh, ax=heat_ax, label='Hours Listened')
+
+    week_ax.plot(weekly.index, to_hours(weekly['msPlayed'].to_numpy()), color="#2e7d32")
+    week_ax.set_ylabel('Hours per Week')
+    week_ax.grid(True)
+
+    skip_rate = timeline.skipped.mean() if len(timeline) else 0.0
+    median_minutes = np.median(sessions['msPlayed'].to_numpy()) / 60_000 if len(sessions) else 0.0
+    heat_ax.set_title(f"{len(sessions):,} sessions, median {median_minutes:.0f} min, {skip_rate:.0%} of plays skipped")
+    fig.tight_layout()
+    return fig
+
+
+def draw_music_profile(genres, audio, coverage, top_n = 10):
+    """
+    Summary: genre shares and audio attributes of the user's listening (HistoryMatch
+    genre_profile and audio_profile) against the catalog average
+    """
+    fig = Figure(figsize=(10, 8))
+    genre_ax, audio_ax = fig.subplots(2, 1)
+    top_genres = top_k(genres, top_n)
+    genre_ax.barh(top_genres.index, top_genres.to_numpy() * 100, color="#2e7d32")
+    genre_ax.invert_yaxis()
+    genre_ax.set_xlabel('% of Matched Listening Time')
+    genre_ax.set_title(f"Matched {coverage['play_share']:.0%} of plays "
+                       f"({coverage['ms_share']:.0%} of listening time) to the songs catalog")
+
+    # Attributes are on different scales, so each is shown in catalog standard deviations from the catalog mean
+    difference = (audio['listened'] - audio['catalog']) / audio['catalog_std'].replace(0, np.nan)
+    positions = np.arange(len(audio))
+    audio_ax.bar(positions, difference.fillna(0), color="#2e7d32")
+    audio_ax.axhline(0.0, color='black', linewidth=1)
+    audio_ax.set_xticks(positions, [name.capitalize() for name in audio.index], rotation=30, ha='right')
+    audio_ax.set_ylabel('You vs Catalog (std devs)')
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,216 @@
+import difflib
+import numpy as np
+import pandas as pd
+from density import AUDIO_ATTRIBUTES
+
+
+# Featured artists and re-release notes that differ between a play and the catalog entry
+FEATURE_PATTERN = r"\s*[\(\[]\s*(?:feat\.?|ft\.?|featuring|with)\s[^\)\]]*[\)\]]|\s+(?:feat\.?|ft\.?|featuring)\s.*$"
+RELEASE_SUFFIX_PATTERN = r"\s+-\s+.*\b(?:remaster(?:ed)?|version|edit|mono|stereo)\b.*$"
+FUZZY_CUTOFF = 0.85
+# Catalog artists compared with difflib for one unmatched artist, picked by shared trigrams
+FUZZY_CANDIDATES = 20
+
+
+def normalize_names(names, track=False):
+    """
+    Summary: comparison form of artist or track names: case-folded, accents and
+    punctuation removed, "&" read as "and", and for tracks "feat." parts and
+    remaster/edit suffixes dropped. Vectorized over the given names.
+    """
+    names = pd.Series(np.asarray(names, dtype=object), dtype=object).astype(str)
+    if track:
+        names = names.str.replace(FEATURE_PATTERN, "", regex=True, case=False)
+        names = names.str.replace(RELEASE_SUFFIX_PATTERN, "", regex=True, case=False)
+    names = names.str.normalize('NFKD').str.replace(r"[\u0300-\u036f]", "", regex=True).str.casefold()
+    names = names.str.replace("&", " and ", regex=False).str.replace(r"[^\w\s]", "", regex=True)
+    names = names.str.replace(r"\s+", " ", regex=True).str.strip()
+    return names.to_numpy()
+
+
+def trigrams(text):
+    """
+    Summary: the set of 3-character pieces of text, padded so short names have some
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramBlocker:
+    """
+    Summary: inverted index from trigrams to names, used to pick the few names worth
+    comparing to a misspelled one. Only the rarer half of a query's trigrams is looked
+    up, so common pieces such as "the" never pull in a large share of the catalog; a
+    name similar enough to pass the fuzzy cutoff shares most trigrams, rare ones included.
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        postings = {}
+        for position, name in enumerate(self.names):
+            for gram in trigrams(name):
+                postings.setdefault(gram, []).append(position)
+        self.postings = {gram: np.array(positions, dtype=np.int64) for gram, positions in postings.items()}
+
+    def candidates(self, name, limit=FUZZY_CANDIDATES):
+        """
+        Summary: up to limit names sharing the most rare trigrams with name
+        """
+        lists = sorted((self.postings[gram] for gram in trigrams(name) if gram in self.postings), key=len)
+        if not lists:
+            return []
+        lists = lists[:len(lists) // 2 + 1]
+        positions, shared = np.unique(np.concatenate(lists), return_counts=True)
+        best = positions[np.argsort(-shared, kind='stable')[:limit]]
+        return [self.names[position] for position in best]
+
+
+def name_keys(artists, tracks):
+    """
+    Summary: uint64 hash of every normalized (artist, track) pair
+    """
+    pairs = pd.Series(artists, dtype=object) + "\x1f" + pd.Series(tracks, dtype=object)
+    return pd.util.hash_array(pairs.to_numpy(dtype=object))
+
+
+class CatalogMatcher:
+    """
+    Summary: hash index from normalized (artist, track) keys to catalog rows.
+    Names are normalized once per distinct catalog artist and song, so building it
+    and matching a history both cost O(distinct names), never O(plays x songs).
+    A song listed more than once maps to its first row.
+    """
+
+    def __init__(self, catalog):
+        df = catalog.df
+        self.catalog = catalog
+        artist_names = normalize_names(df['artist'].cat.categories)
+        song_names = normalize_names(df['song'].cat.categories, track=True)
+        self.row_artists = artist_names[df['artist'].cat.codes.to_numpy()]
+        row_songs = song_names[df['song'].cat.codes.to_numpy()]
+        keys = name_keys(self.row_artists, row_songs)
+        unique_keys, first_rows = np.unique(keys, return_index=True)
+        self.index = pd.Index(unique_keys)
+        self.rows = first_rows
+
+        # For the fuzzy fallback: normalized song names of each normalized artist, and a
+        # trigram index over the artist names, both built on first use
+        self._songs_by_artist = None
+        self._artist_blocker = None
+        self._row_songs = row_songs
+
+    def lookup(self, artists, tracks):
+        """
+        Summary: catalog row of every normalized (artist, track) pair, -1 where there is none
+        """
+        positions = self.index.get_indexer(name_keys(artists, tracks))
+        return np.where(positions >= 0, self.rows[np.maximum(positions, 0)], -1)
+
+    def fuzzy_lookup(self, artists, tracks, cutoff=FUZZY_CUTOFF):
+        """
+        Summary: closest catalog row by track name among the songs of the same (or the
+        closest spelled) artist, -1 when nothing is similar enough. Only meant for the
+        few pairs the exact lookup missed. A misspelled artist is compared with the
+        FUZZY_CANDIDATES catalog artists sharing the most trigrams with it, never
+        with the whole catalog.
+        """
+        if self._songs_by_artist is None:
+            frame = pd.DataFrame({'artist': self.row_artists, 'song': self._row_songs})
+            self._songs_by_artist = {artist: group for artist, group in
+                                     frame.groupby('artist', sort=False)['song']}
+            self._artist_blocker = TrigramBlocker(self._songs_by_artist)
+        rows = np.full(len(artists), -1, dtype=np.int64)
+        resolved = {}
+        for i, (artist, track) in enumerate(zip(artists, tracks)):
+            if artist not in resolved:
+                close = [artist] if artist in self._songs_by_artist else \
+                    difflib.get_close_matches(artist, self._artist_blocker.candidates(artist), n=1, cutoff=cutoff)
+                resolved[artist] = self._songs_by_artist[close[0]] if close else None
+            songs = resolved[artist]
+            if songs is None:
+                continue
+            close = difflib.get_close_matches(track, list(songs.to_numpy()), n=1, cutoff=cutoff)
+            if close:
+                rows[i] = songs.index[songs.to_numpy() == close[0]][0]
+        return rows
+
+
+class HistoryMatch:
+    """
+    Summary: a StreamingHistory joined to the catalog. catalog_rows holds the matched
+    catalog row of every play (-1 if unmatched), profiles are weighted by ms played.
+    """
+
+    def __init__(self, history, catalog, catalog_rows):
+        self.history = history
+        self.catalog = catalog
+        self.catalog_rows = catalog_rows
+        self.matched = catalog_rows >= 0
+        self.ms_played = history.ms_played.astype(np.int64, copy=False)
+
+    def coverage(self):
+        """
+        Summary: share of plays and of listening time that matched a catalog song
+        """
+        total_ms = self.ms_played.sum()
+        return {
+            'plays': int(len(self.matched)),
+            'matched_plays': int(self.matched.sum()),
+            'play_share': float(self.matched.mean()) if len(self.matched) else 0.0,
+            'ms_share': float(self.ms_played[self.matched].sum() / total_ms) if total_ms else 0.0,
+        }
+
+    def row_ms(self):
+        """
+        Summary: ms played per catalog row
+        """
+        return np.bincount(self.catalog_rows[self.matched], weights=self.ms_played[self.matched],
+                           minlength=len(self.catalog))
+
+    def genre_profile(self):
+        """
+        Summary: share of the matched listening time per genre, a song counting fully for each of its genres
+        """
+        row_ms = self.row_ms()
+        rows = np.flatnonzero(row_ms)
+        pair_rows, pair_genres = self.catalog.index.row_genre_pairs(rows)
+        ms = np.bincount(pair_genres, weights=row_ms[pair_rows], minlength=len(self.catalog.genre_names))
+        present = ms > 0
+        total = row_ms.sum()
+        shares = ms[present] / total if total else ms[present]
+        return pd.Series(shares, index=self.catalog.genre_names[present], name='share').sort_values(ascending=False)
+
+    def audio_profile(self, attributes=AUDIO_ATTRIBUTES):
+        """
+        Summary: ms-weighted mean of every audio attribute over the matched plays,
+        next to the catalog-wide mean and standard deviation
+        """
+        row_ms = self.row_ms()
+        total = row_ms.sum()
+        features = self.catalog.df[attributes].to_numpy(dtype=np.float64)
+        listened = row_ms @ features / total if total else np.full(len(attributes), np.nan)
+        return pd.DataFrame({'listened': listened, 'catalog': features.mean(axis=0), 'catalog_std': features.std(axis=0)},
+                            index=pd.Index(attributes, name='attribute'))
+
+
+def match_history(history, catalog, fuzzy=False, cutoff=FUZZY_CUTOFF):
+    """
+    Summary: joins every play of a StreamingHistory to the catalog. Names are normalized
+    per distinct artist and track of the history, and each distinct (artist, track)
+    pair is looked up once. With fuzzy, pairs without an exact match get a
+    difflib fallback restricted to the songs of the same artist.
+    """
+    matcher = catalog.matcher
+    artists = normalize_names(history.artist_names)
+    tracks = normalize_names(history.track_names, track=True)
+
+    width = max(len(history.track_names), 1)
+    pairs, inverse = np.unique(history.artist_codes.astype(np.int64) * width + history.track_codes, return_inverse=True)
+    pair_artists = artists[pairs // width]
+    pair_tracks = tracks[pairs % width]
+
+    pair_rows = matcher.lookup(pair_artists, pair_tracks)
+    if fuzzy:
+        missing = np.flatnonzero(pair_rows < 0)
+        pair_rows[missing] = matcher.fuzzy_lookup(pair_artists[missing], pair_tracks[missing], cutoff)
+    return HistoryMatch(history, catalog, pair_rows[inverse])
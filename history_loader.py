@@ -0,0 +1,225 @@
+import io
+import json
+import os
+import re
+import zipfile
+from contextlib import contextmanager
+import numpy as np
+
+
+# Spotify splits exports into numbered shards. The account-data export uses
+# StreamingHistory_music_N.json (older ones StreamingHistoryN.json), the
+# extended export uses Streaming_History_Audio_<years>_N.json.
+SHARD_PATTERN = re.compile(r"^(StreamingHistory(_music_)?\d+|Streaming_History_Audio_.*)\.json$")
+
+CHUNK_SIZE = 1 << 20
+BATCH_SIZE = 50_000
+
+
+def _shard_sort_key(name):
+    numbers = re.findall(r"\d+", os.path.basename(name))
+    return [int(n) for n in numbers], name
+
+
+def find_history_shards(path):
+    """
+    Summary: lists the streaming history shards that make up an export.
+    path can be a directory, a zip archive or a single shard. Picking a single
+    shard picks up its numbered siblings in the same directory as well.
+    Returns a list of (display name, opener) pairs in shard order.
+    """
+    if os.path.isdir(path):
+        names = [n for n in os.listdir(path) if SHARD_PATTERN.match(n)]
+        paths = [os.path.join(path, n) for n in sorted(names, key=_shard_sort_key)]
+        return [(p, _file_opener(p)) for p in paths]
+
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            members = [m for m in archive.namelist() if SHARD_PATTERN.match(os.path.basename(m))]
+        return [(f"{path}:{m}", _zip_opener(path, m)) for m in sorted(members, key=_shard_sort_key)]
+
+    if SHARD_PATTERN.match(os.path.basename(path)):
+        return find_history_shards(os.path.dirname(path) or ".")
+    return [(path, _file_opener(path))]
+
+
+def _file_opener(path):
+    return lambda: open(path, 'r', encoding='utf-8')
+
+
+def _zip_opener(path, member):
+    @contextmanager
+    def opener():
+        with zipfile.ZipFile(path) as archive, archive.open(member) as raw:
+            yield io.TextIOWrapper(raw, encoding='utf-8')
+    return opener
+
+
+def iter_json_array(file, chunk_size=CHUNK_SIZE):
+    """
+    Summary: yields the elements of a top level JSON array one at a time.
+    Only one chunk plus the element being decoded is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        # Skip whitespace and separators between elements
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+
+        if pos >= len(buffer):
+            if eof:
+                raise json.JSONDecodeError("Unterminated array", buffer, pos)
+            buffer = buffer[pos:] + file.read(chunk_size)
+            pos = 0
+            eof = len(buffer) == 0
+            continue
+
+        if not started:
+            if buffer[pos] != '[':
+                raise json.JSONDecodeError("Expected a JSON array", buffer, pos)
+            started = True
+            pos += 1
+            continue
+
+        if buffer[pos] == ']':
+            return
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+            # Only trust a decode followed by a separator: a number cut by the chunk end
+            # ("123" of 12345, "-0." of -0.5) also decodes, as a shorter value
+            complete = eof or (end < len(buffer) and buffer[end] in " \t\r\n,]")
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            # The element may run past the end of the chunk, read more and retry
+            chunk = file.read(chunk_size)
+            eof = len(chunk) == 0
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        yield value
+        pos = end
+        if pos > chunk_size:
+            buffer = buffer[pos:]
+            pos = 0
+
+
+def _normalize_record(entry):
+    # Extended history uses different field names for the same data
+    if 'ts' in entry:
+        return {
+            'endTime': entry['ts'][:16].replace('T', ' '),
+            'artistName': entry.get('master_metadata_album_artist_name'),
+            'trackName': entry.get('master_metadata_track_name'),
+            'msPlayed': entry.get('ms_played', 0),
+        }
+    return entry
+
+
+def iter_records(path, chunk_size=CHUNK_SIZE):
+    """
+    Summary: streams every play record of an export, shard after shard.
+    Podcast episodes in extended history (no artist or track) are skipped.
+    """
+    for _, opener in find_history_shards(path):
+        with opener() as file:
+            for entry in iter_json_array(file, chunk_size):
+                record = _normalize_record(entry)
+                if record.get('artistName') is None or record.get('trackName') is None:
+                    continue
+                yield record
+
+
+def iter_batches(path, batch_size=BATCH_SIZE):
+    """
+    Summary: groups the streamed records into lists of at most batch_size
+    """
+    batch = []
+    for record in iter_records(path):
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class StreamingHistory:
+    """
+    Summary: columnar play history. Artists and tracks are stored as int32
+    codes into artist_names/track_names, endTime as datetime64[m] and
+    msPlayed as int64.
+    """
+
+    def __init__(self, end_time, artist_codes, artist_names, track_codes, track_names, ms_played):
+        self.end_time = end_time
+        self.artist_codes = artist_codes
+        self.artist_names = artist_names
+        self.track_codes = track_codes
+        self.track_names = track_names
+        self.ms_played = ms_played
+
+    def __len__(self):
+        return len(self.ms_played)
+
+
+class HistoryBuilder:
+    """
+    Summary: builds a StreamingHistory one batch at a time so only the
+    current batch is ever held as Python dicts.
+    """
+
+    def __init__(self):
+        self._artists = {}
+        self._tracks = {}
+        self._end_time = []
+        self._artist_codes = []
+        self._track_codes = []
+        self._ms_played = []
+
+    @staticmethod
+    def _encode(values, table):
+        return np.fromiter((table.setdefault(v, len(table)) for v in values), dtype=np.int32, count=len(values))
+
+    def add_batch(self, batch):
+        self._end_time.append(np.array([r['endTime'] for r in batch], dtype='datetime64[m]'))
+        self._artist_codes.append(self._encode([r['artistName'] for r in batch], self._artists))
+        self._track_codes.append(self._encode([r['trackName'] for r in batch], self._tracks))
+        self._ms_played.append(np.fromiter((r['msPlayed'] for r in batch), dtype=np.int64, count=len(batch)))
+
+    def build(self):
+        def join(parts, dtype):
+            return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+        return StreamingHistory(
+            end_time=join(self._end_time, 'datetime64[m]'),
+            artist_codes=join(self._artist_codes, np.int32),
+            artist_names=np.array(list(self._artists), dtype=object),
+            track_codes=join(self._track_codes, np.int32),
+            track_names=np.array(list(self._tracks), dtype=object),
+            ms_played=join(self._ms_played, np.int64),
+        )
+
+
+def load_history(path, batch_size=BATCH_SIZE, on_batch=None):
+    """
+    Summary: reads all shards of an export into a StreamingHistory.
+    on_batch(records_so_far) is called after every batch, it may raise to stop loading.
+    """
+    builder = HistoryBuilder()
+    count = 0
+    for batch in iter_batches(path, batch_size):
+        builder.add_batch(batch)
+        count += len(batch)
+        if on_batch is not None:
+            on_batch(count)
+    return builder.build()
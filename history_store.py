@@ -0,0 +1,232 @@
+import json
+import os
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+from history_loader import StreamingHistory
+
+
+STORE_DIR = ".history_store"
+# Serializes imports and rollup reads: every HistoryStore on a path shares the
+# segment numbering and the rollup file, and an import replaces the rollup
+_lock = threading.Lock()
+
+
+def play_keys(end_time, artist_names, track_names):
+    """
+    Summary: uint64 hash of (endTime, trackName, artistName) for every play,
+    computed column-wise by pandas without a per-row Python loop
+    """
+    frame = pd.DataFrame({
+        'endTime': end_time.astype('datetime64[m]').astype(np.int64),
+        'trackName': track_names,
+        'artistName': artist_names,
+    })
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+class HistoryStore:
+    """
+    Summary: persistent local store of every play imported so far.
+    Each import is appended as one segment of .npy columns with its play keys
+    sorted, so checking new plays against old ones is a binary search per segment.
+    Per-artist and per-(artist, track) rollups are kept on disk and updated from
+    the new rows only. manifest.json is replaced last, so an interrupted import
+    leaves the previous state intact. Imports are serialized, each one starting from
+    the manifest on disk, so stores opened on the same path never share a segment.
+    """
+
+    def __init__(self, path=STORE_DIR):
+        self.path = path
+        os.makedirs(os.path.join(path, "segments"), exist_ok=True)
+        self._reload()
+
+    def _reload(self):
+        """
+        Summary: re-reads the manifest and name tables, which another HistoryStore
+        on the same path may have changed since this one was opened
+        """
+        self.manifest = self._read_json("manifest.json", {'segments': [], 'rollup': None, 'next_segment': 0})
+        self.artists = self._read_json("artists.json", [])
+        self.tracks = self._read_json("tracks.json", [])
+        self._artist_codes = {name: code for code, name in enumerate(self.artists)}
+        self._track_codes = {name: code for code, name in enumerate(self.tracks)}
+
+    def _read_json(self, name, default):
+        try:
+            with open(os.path.join(self.path, name), encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return default
+
+    def _write_json(self, name, value):
+        tmp_path = os.path.join(self.path, name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(value, file)
+        os.replace(tmp_path, os.path.join(self.path, name))
+
+    def __len__(self):
+        return sum(segment['rows'] for segment in self.manifest['segments'])
+
+    def _segment_path(self, segment_id):
+        return os.path.join(self.path, "segments", f"{segment_id:06d}")
+
+    def _load_segment(self, segment_id, column):
+        return np.load(os.path.join(self._segment_path(segment_id), f"{column}.npy"), mmap_mode='r')
+
+    def _encode(self, names, table, codes):
+        # Map the export's own name codes onto the store's, one lookup per distinct name
+        mapping = np.empty(len(names), dtype=np.int32)
+        for i, name in enumerate(names):
+            code = codes.get(name)
+            if code is None:
+                code = codes[name] = len(table)
+                table.append(name)
+            mapping[i] = code
+        return mapping
+
+    def _is_known(self, keys):
+        known = np.zeros(len(keys), dtype=bool)
+        for segment in self.manifest['segments']:
+            segment_keys = self._load_segment(segment['id'], "keys")
+            if len(segment_keys) == 0:
+                continue
+            positions = np.minimum(np.searchsorted(segment_keys, keys), len(segment_keys) - 1)
+            known |= segment_keys[positions] == keys
+        return known
+
+    def import_history(self, history):
+        """
+        Summary: merges a StreamingHistory into the store, skipping plays that were
+        imported before. Returns the number of new plays.
+        """
+        keys = play_keys(history.end_time, history.artist_names[history.artist_codes],
+                         history.track_names[history.track_codes])
+        with _lock:
+            self._reload()
+            return self._append(history, keys)
+
+    def _append(self, history, keys):
+        _, first = np.unique(keys, return_index=True)
+        new = np.zeros(len(keys), dtype=bool)
+        new[first] = True
+        new &= ~self._is_known(keys)
+        if not new.any():
+            return 0
+
+        artist_codes = self._encode(history.artist_names, self.artists, self._artist_codes)[history.artist_codes[new]]
+        track_codes = self._encode(history.track_names, self.tracks, self._track_codes)[history.track_codes[new]]
+        ms_played = history.ms_played[new].astype(np.int64)
+        new_keys = keys[new]
+        self._write_json("artists.json", self.artists)
+        self._write_json("tracks.json", self.tracks)
+
+        segment_id = self.manifest['next_segment']
+        segment_path = self._segment_path(segment_id)
+        tmp_path = segment_path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        columns = {
+            'end_time': history.end_time[new].astype('datetime64[m]'),
+            'artist': artist_codes,
+            'track': track_codes,
+            'ms_played': ms_played,
+            'keys': np.sort(new_keys),
+        }
+        for column, values in columns.items():
+            np.save(os.path.join(tmp_path, f"{column}.npy"), values)
+        shutil.rmtree(segment_path, ignore_errors=True)  # left over from an interrupted import
+        os.replace(tmp_path, segment_path)
+
+        rollup_name = self._update_rollups(segment_id, artist_codes, track_codes, ms_played)
+
+        old_rollup = self.manifest['rollup']
+        self.manifest['segments'].append({'id': segment_id, 'rows': int(new.sum())})
+        self.manifest['rollup'] = rollup_name
+        self.manifest['next_segment'] = segment_id + 1
+        self._write_json("manifest.json", self.manifest)
+        if old_rollup:
+            try:
+                os.remove(os.path.join(self.path, old_rollup))
+            except FileNotFoundError:
+                pass
+        return int(new.sum())
+
+    def _read_rollups(self):
+        if not self.manifest['rollup']:
+            empty = np.zeros(0, dtype=np.int64)
+            return {'artist_ms': empty, 'artist_plays': empty,
+                    'track_pairs': empty, 'track_ms': empty, 'track_plays': empty}
+        with np.load(os.path.join(self.path, self.manifest['rollup'])) as rollups:
+            return {name: rollups[name] for name in rollups.files}
+
+    def _current_rollups(self):
+        # Under the lock, so a concurrent import cannot remove the rollup being read
+        with _lock:
+            self._reload()
+            return self._read_rollups()
+
+    def _update_rollups(self, segment_id, artist_codes, track_codes, ms_played):
+        rollups = self._read_rollups()
+        n_artists = len(self.artists)
+
+        artist_ms = np.bincount(artist_codes, weights=ms_played, minlength=n_artists).astype(np.int64)
+        artist_plays = np.bincount(artist_codes, minlength=n_artists)
+        artist_ms[:len(rollups['artist_ms'])] += rollups['artist_ms']
+        artist_plays[:len(rollups['artist_plays'])] += rollups['artist_plays']
+
+        # (artist, track) pairs packed into one int64 so they group with np.unique
+        pairs = artist_codes.astype(np.int64) << 32 | track_codes.astype(np.int64)
+        all_pairs, inverse = np.unique(np.concatenate([rollups['track_pairs'], pairs]), return_inverse=True)
+        track_ms = np.bincount(inverse, weights=np.concatenate([rollups['track_ms'], ms_played]),
+                               minlength=len(all_pairs)).astype(np.int64)
+        track_plays = np.bincount(inverse, weights=np.concatenate([rollups['track_plays'], np.ones(len(pairs), np.int64)]),
+                                  minlength=len(all_pairs)).astype(np.int64)
+
+        rollup_name = f"rollup_{segment_id:06d}.npz"
+        np.savez(os.path.join(self.path, rollup_name), artist_ms=artist_ms, artist_plays=artist_plays,
+                 track_pairs=all_pairs, track_ms=track_ms, track_plays=track_plays)
+        return rollup_name
+
+    def artist_totals(self):
+        """
+        Summary: msPlayed and play count per artist over everything imported, read from the rollup
+        """
+        rollups = self._current_rollups()
+        names = np.array(self.artists[:len(rollups['artist_ms'])], dtype=object)
+        return pd.DataFrame({'msPlayed': rollups['artist_ms'], 'plays': rollups['artist_plays']},
+                            index=pd.Index(names, name='artistName'))
+
+    def track_totals(self):
+        """
+        Summary: msPlayed and play count per (artist, track) over everything imported
+        """
+        rollups = self._current_rollups()
+        artists = np.array(self.artists, dtype=object)
+        tracks = np.array(self.tracks, dtype=object)
+        pairs = rollups['track_pairs']
+        index = pd.MultiIndex.from_arrays([artists[pairs >> 32], tracks[pairs & 0xFFFFFFFF]],
+                                          names=['artistName', 'trackName'])
+        return pd.DataFrame({'msPlayed': rollups['track_ms'], 'plays': rollups['track_plays']}, index=index)
+
+    def history(self):
+        """
+        Summary: every stored play as one StreamingHistory
+        """
+        with _lock:
+            self._reload()
+        segments = [segment['id'] for segment in self.manifest['segments']]
+
+        def column(name, dtype):
+            parts = [self._load_segment(segment_id, name) for segment_id in segments]
+            return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+        return StreamingHistory(
+            end_time=column("end_time", 'datetime64[m]'),
+            artist_codes=column("artist", np.int32),
+            artist_names=np.array(self.artists, dtype=object),
+            track_codes=column("track", np.int32),
+            track_names=np.array(self.tracks, dtype=object),
+            ms_played=column("ms_played", np.int64),
+        )
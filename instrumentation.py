@@ -0,0 +1,211 @@
+import atexit
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# SPOTIFY_TRACE=1 writes this session's spans to TRACE_DIR when the process exits,
+# SPOTIFY_TRACE_MEMORY=1 measures per-span peak allocations with tracemalloc,
+# SPOTIFY_PROFILE=1 runs every outermost span of a thread under cProfile.
+TRACE_DIR = ".traces"
+TRACE_ENABLED = os.environ.get("SPOTIFY_TRACE", "") not in ("", "0")
+TRACE_MEMORY = os.environ.get("SPOTIFY_TRACE_MEMORY", "") not in ("", "0")
+PROFILE_ENABLED = os.environ.get("SPOTIFY_PROFILE", "") not in ("", "0")
+MAX_SPANS = 100_000
+
+SESSION = f"{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}"
+_origin = time.perf_counter()
+_spans = []
+_spans_lock = threading.Lock()
+_local = threading.local()
+_profile_counter = 0
+
+if TRACE_MEMORY:
+    tracemalloc.start()
+
+
+def _max_rss_bytes():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _start_profile(name):
+    global _profile_counter
+    with _spans_lock:
+        _profile_counter += 1
+        number = _profile_counter
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:  # another profiler is already active on this thread
+        return None, None
+    safe_name = "".join(c if c.isalnum() or c in "._-" else "_" for c in name)
+    return profile, os.path.join(TRACE_DIR, SESSION, f"{number:04d}_{safe_name}.prof")
+
+
+@contextmanager
+def span(name, **args):
+    """
+    Summary: times the enclosed block as one pipeline stage: wall time, CPU time of
+    the calling thread, growth of the process peak RSS and, with SPOTIFY_TRACE_MEMORY,
+    the peak traced allocation. Spans nest per thread. args are kept with the span.
+    """
+    stack = _stack()
+    depth = len(stack)
+    profile = profile_path = None
+    if PROFILE_ENABLED and depth == 0:
+        profile, profile_path = _start_profile(name)
+
+    if TRACE_MEMORY:
+        # tracemalloc has one process-wide peak: save the enclosing span's peak so far and restart it
+        _, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        tracemalloc.reset_peak()
+    frame = {'peak': 0, 'start_traced': tracemalloc.get_traced_memory()[0] if TRACE_MEMORY else 0}
+    stack.append(frame)
+
+    rss_before = _max_rss_bytes()
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        wall_s = time.perf_counter() - wall
+        cpu_s = time.thread_time() - cpu
+        stack.pop()
+        record = {
+            'name': name,
+            'start_s': wall - _origin,
+            'wall_s': wall_s,
+            'cpu_s': cpu_s,
+            'thread': threading.current_thread().name,
+            'thread_id': threading.get_ident(),
+            'depth': depth,
+            'args': args,
+        }
+        rss_after = _max_rss_bytes()
+        if rss_before is not None:
+            record['max_rss_growth'] = rss_after - rss_before
+        if TRACE_MEMORY:
+            peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            record['peak_bytes'] = max(peak - frame['start_traced'], 0)
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        if error:
+            record['error'] = error
+        if profile is not None:
+            profile.disable()
+            os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+            profile.dump_stats(profile_path)
+            record['profile'] = profile_path
+        with _spans_lock:
+            if len(_spans) < MAX_SPANS:
+                _spans.append(record)
+
+
+def traced(name=None):
+    """
+    Summary: decorator form of span, named after the function unless name is given
+    """
+    def decorate(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def spans():
+    """
+    Summary: copies of every span recorded so far in this process, in the order they ended
+    """
+    with _spans_lock:
+        return list(_spans)
+
+
+def summary():
+    """
+    Summary: per span name: calls, total and max wall seconds, total CPU seconds, slowest first
+    """
+    totals = {}
+    for record in spans():
+        entry = totals.setdefault(record['name'], {'name': record['name'], 'calls': 0, 'wall_s': 0.0,
+                                                   'max_wall_s': 0.0, 'cpu_s': 0.0})
+        entry['calls'] += 1
+        entry['wall_s'] += record['wall_s']
+        entry['max_wall_s'] = max(entry['max_wall_s'], record['wall_s'])
+        entry['cpu_s'] += record['cpu_s']
+    return sorted(totals.values(), key=lambda entry: entry['wall_s'], reverse=True)
+
+
+def write_trace(path=None):
+    """
+    Summary: writes the session's spans in the Chrome trace event format, which
+    chrome://tracing, Perfetto and speedscope show as a flame chart per thread.
+    Returns the path written.
+    """
+    path = path or os.path.join(TRACE_DIR, f"trace_{SESSION}.json")
+    events = []
+    threads = {}
+    for record in spans():
+        threads[record['thread_id']] = record['thread']
+        event_args = dict(record['args'], cpu_ms=round(record['cpu_s'] * 1000, 3))
+        for key in ('peak_bytes', 'max_rss_growth', 'error', 'profile'):
+            if key in record:
+                event_args[key] = record[key]
+        events.append({
+            'name': record['name'], 'ph': 'X', 'pid': os.getpid(), 'tid': record['thread_id'],
+            'ts': round(record['start_s'] * 1e6, 1), 'dur': round(record['wall_s'] * 1e6, 1),
+            'args': {key: value if isinstance(value, (int, float, bool)) else str(value)
+                     for key, value in event_args.items()},
+        })
+    for thread_id, thread_name in threads.items():
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': thread_id,
+                       'args': {'name': thread_name}})
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                   'otherData': {'session': SESSION, 'summary': summary()}}, file)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _write_trace_at_exit():
+    if _spans:
+        write_trace()
+
+
+if TRACE_ENABLED:
+    atexit.register(_write_trace_at_exit)
@@ -1,36 +1,21 @@
 import tkinter as tk
 from tkinter import Toplevel
-from PIL import Image, ImageTk, ImageSequence
+from animation import GifPlayer, preload
+from functools import partial
+from instrumentation import span, traced
 
 
+@traced("ui.show_about_project")
 def show_about_project():
     about_window = Toplevel()
     about_window.title("About the Project")
     about_window.geometry("700x800")
     about_window.configure(bg="black")
 
-    # Load the animated GIF
-    gif_path = "LogoSpotify.gif"
-    gif = Image.open(gif_path)
-
-    frames = []
-    try:
-        for frame in ImageSequence.Iterator(gif):
-            frame = frame.convert('RGBA')
-            frames.append(ImageTk.PhotoImage(frame))
-    except EOFError:
-        pass
-
+    # Play the animated GIF, frames are shared with earlier About windows
     gif_label = tk.Label(about_window, bg="black")
     gif_label.pack(pady=20)
-
-    def update(ind):
-        frame = frames[ind]
-        gif_label.configure(image=frame)
-        ind = (ind + 1) % len(frames)
-        about_window.after(100, update, ind)
-
-    update(0)
+    GifPlayer(gif_label, "LogoSpotify.gif").start()
 
     # Team names
     creators = tk.Label(about_window, text="Created by:\nLogan Mitchell, Samantha Cuenot, Minh Anh Do",
@@ -45,21 +30,42 @@ def show_about_project():
                        font=("Helvetica", 14), fg="white", bg="black", justify="center")
     summary.pack(pady=10)
 
-def explore_data_sets():
-    import main
-    main.run_main_program()
+def explore_data_sets(window):
+    with span("ui.import_main"):
+        import main
+    main.run_main_program(window)
 
-def analyze_own_data():
-    from personal_data import import_json_from_user, plot_top_artists
+def analyze_own_data(window):
+    from personal_data import ask_export_path, analyze_history_task, show_top_artists
+    from tasks import run_in_background
 
-    data = import_json_from_user()
-    if data:
-        plot_top_artists(data)
-    else:
-        from tkinter import messagebox
-        messagebox.showerror("Error", "No data was loaded. Please try again.")
+    file_path = ask_export_path()
+    if not file_path:
+        return
+
+    def show_result(image):
+        if image is not None:
+            show_top_artists(image)
+        else:
+            from tkinter import messagebox
+            messagebox.showerror("Error", "No data was loaded. Please try again.")
+
+    run_in_background(analyze_history_task, file_path, on_done=show_result, title="Analyzing your data",
+                      widget=window)
 
 def main_menu():
+    # Decode both GIFs in the background while the window is built
+    preload("Nt6v.gif", "LogoSpotify.gif")
+
+    window = build_main_menu()
+    window.mainloop()
+    # The app window is closed: stop the chart workers instead of waiting on charts still queued
+    from chart_workers import shutdown_pool
+    shutdown_pool()
+
+
+@traced("ui.build_main_menu")
+def build_main_menu():
     window = tk.Tk()
     window.title("Spotify Interactive Dashboard")
     window.geometry("700x800")
@@ -69,27 +75,9 @@ def main_menu():
                            font=("Helvetica", 28, "bold"), fg="#1DB954", bg="black")
     title_label.pack(pady=20)
 
-    gif_path = "Nt6v.gif"
-    gif = Image.open(gif_path)
-
-    frames = []
-    try:
-        for frame in ImageSequence.Iterator(gif):
-            frame = frame.convert('RGBA')
-            frames.append(ImageTk.PhotoImage(frame))
-    except EOFError:
-        pass
-
     gif_label = tk.Label(window, bg="black")
     gif_label.pack(pady=10)
-
-    def update_gif(ind):
-        frame = frames[ind]
-        gif_label.configure(image=frame)
-        ind = (ind + 1) % len(frames)
-        window.after(100, update_gif, ind)
-
-    update_gif(0)
+    GifPlayer(gif_label, "Nt6v.gif").start()
 
     # --- Buttons ---
     button_frame = tk.Frame(window, bg="black")
@@ -99,15 +87,15 @@ def main_menu():
                               font=("Helvetica", 14), width=30, height=2, bg="#1DB954", fg="black")
     about_button.pack(pady=10)
 
-    explore_button = tk.Button(button_frame, text="Explore General Datasets", command=explore_data_sets,
+    explore_button = tk.Button(button_frame, text="Explore General Datasets", command=partial(explore_data_sets, window),
                                 font=("Helvetica", 14), width=30, height=2, bg="#1DB954", fg="black")
     explore_button.pack(pady=10)
 
-    analyze_button = tk.Button(button_frame, text="Analyze Your Own Data", command=analyze_own_data,
+    analyze_button = tk.Button(button_frame, text="Analyze Your Own Data", command=partial(analyze_own_data, window),
                                 font=("Helvetica", 14), width=30, height=2, bg="#1DB954", fg="black")
     analyze_button.pack(pady=10)
-
-    window.mainloop()
+    return window
 
 # Run the app
-main_menu()
+if __name__ == "__main__":
+    main_menu()
@@ -1,83 +1,104 @@
 # --- IMPORTS ---
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import tkinter as tk
 from tkinter import simpledialog
-from PIL import Image, ImageTk
+from PIL import ImageTk
 from functools import partial
+from catalog_cache import load_catalog
+from render_cache import chart_cache, ask_export_png
+from chart_workers import shutdown_pool, submit_charts
+from tasks import run_in_background
+from table_view import TableColumn, VirtualTable
+from density import AUDIO_ATTRIBUTES
+from probability import LEVELS
+from catalog_index import parse_period
+from topk import top_k_positions
+from similarity import similar_songs
+from catalog_charts import (DASHBOARD_CHARTS, DASHBOARD_CHART_SIZE, TREND_GENRES, draw_genre_trends, draw_relationship_plot,
+                            draw_top_genres_explore)
+from instrumentation import span, traced
+
+POPUP_CHART_SIZE = (650, 500)
+SIMILAR_SONGS = 20
 
 # --- MAIN ENTRY POINT ---
-def run_main_program():
+def run_main_program(parent=None):
+    """
+    Opens the dataset dashboard. The catalog loads on a background thread so the
+    calling window stays responsive, parent is the running app's root window if any
+    """
     csv_path = "songs_normalize.csv"
-    df = pd.read_csv(csv_path)
 
-    root = tk.Tk()
-    root.withdraw()
+    root = parent
+    if root is None:
+        root = tk.Tk()
+        root.withdraw()
+
+    run_in_background(load_catalog_task, csv_path, on_done=show_dashboard, title="Loading songs catalog", widget=root)
+
+    if parent is None:
+        root.mainloop()
+        shutdown_pool()
+
+
+def load_catalog_task(task, csv_path):
+    task.report("Reading songs catalog...")
+    with span("catalog.load"):
+        catalog = load_catalog(csv_path)
+    task.check_cancelled()
+    task.report("Building lookup indexes...")
+    with span("catalog.build_index"):
+        catalog.index
+    return catalog
+
+
+@traced("ui.show_dashboard")
+def show_dashboard(catalog):
+    open_dashboard_window(catalog, generate_all_charts(catalog))
+
+
+def render_chart_task(task, catalog, chart, params, draw):
+    with span("chart.render", chart=chart):
+        return chart_cache.render(catalog.fingerprint, chart, params, draw, POPUP_CHART_SIZE)
 
-    generate_all_charts(df)
-    open_dashboard_window(df)
 
-    root.mainloop()
+def show_chart_popup(title, image):
+    result_window = tk.Toplevel()
+    result_window.title(title)
+    result_window.geometry("750x640")
+    result_window.configure(bg="black")
+
+    img_tk = ImageTk.PhotoImage(image)
+
+    img_label = tk.Label(result_window, image=img_tk, bg="black")
+    img_label.image = img_tk
+    img_label.pack(pady=20)
+
+    button_frame = tk.Frame(result_window, bg="black")
+    button_frame.pack(pady=10)
+
+    save_button = tk.Button(button_frame, text="Save as PNG", command=partial(ask_export_png, image),
+                            bg="#1DB954", fg="black", font=("Helvetica", 12))
+    save_button.pack(side="left", padx=10)
+
+    close_button = tk.Button(button_frame, text="Close", command=result_window.destroy,
+                             bg="#1DB954", fg="black", font=("Helvetica", 12))
+    close_button.pack(side="left", padx=10)
 
 
 # --- GENERATE DASHBOARD CHARTS ---
-def generate_all_charts(df):
+@traced("dashboard.submit_charts")
+def generate_all_charts(catalog):
     """
     Author: Minh Anh Do
     There are different charts that our program can generate
     For each chart, users can select the input of their choice and generate graphs from different input
+    Charts render in parallel on a process pool (or come from the render cache), returns chart name -> Future of the rendered image
 
     """
-    # Top Artists
-    top_artists = df.groupby('artist')['popularity'].mean().sort_values(ascending=False).head(5)
-    fig, ax = plt.subplots(figsize=(4, 4))
-    top_artists.plot(kind='pie', autopct='%1.1f%%', startangle=140, colors=sns.color_palette('pastel'), ax=ax)
-    ax.set_ylabel('')
-    plt.title('Top Artists')
-    plt.tight_layout()
-    fig.savefig("top_artists_chart.png")
-    plt.close(fig)
-
-    # Top Genres
-    df['genre'] = df['genre'].astype(str).str.replace(r"[\[\]']", "", regex=True).str.strip()
-    df['genre'] = df['genre'].str.split(', ')
-    df_exploded = df.explode('genre')
-    top_genres = df_exploded['genre'].value_counts().head(5)
-    fig, ax = plt.subplots(figsize=(4, 4))
-    top_genres.plot(kind='bar', color=sns.color_palette('muted'), ax=ax)
-    plt.title('Top Genres')
-    plt.ylabel('Songs')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    fig.savefig("top_genres_chart.png")
-    plt.close(fig)
-
-    # Listening Timeline
-    year_counts = df['year'].value_counts().sort_index()
-    fig, ax = plt.subplots(figsize=(4, 4))
-    sns.lineplot(x=year_counts.index, y=year_counts.values, marker="o", ax=ax)
-    plt.title('Listening Timeline')
-    plt.xlabel('Year')
-    plt.ylabel('Number of Songs')
-    plt.grid(True)
-    plt.tight_layout()
-    fig.savefig("listening_timeline.png")
-    plt.close(fig)
-
-    # Top Tracks
-    top_tracks = df.groupby('song')['popularity'].mean().sort_values(ascending=False).head(5)
-    fig, ax = plt.subplots(figsize=(4, 4))
-    top_tracks.plot(kind='barh', color=sns.color_palette('pastel'), ax=ax)
-    plt.title('Top Tracks')
-    plt.xlabel('Popularity')
-    plt.gca().invert_yaxis()
-    plt.tight_layout()
-    fig.savefig("top_tracks_chart.png")
-    plt.close(fig)
+    return submit_charts(catalog, DASHBOARD_CHARTS, DASHBOARD_CHART_SIZE)
 
 # --- OPEN DASHBOARD ---
-def open_dashboard_window(df):
+def open_dashboard_window(catalog, chart_images):
     """
     Author: Minh Anh Do
     From the charts that generate, format and provide the interface
@@ -85,7 +106,7 @@ def open_dashboard_window(df):
     """
     window = tk.Toplevel()
     window.title("Spotify Interactive Dashboard - Explore Datasets")
-    window.geometry("1200x800")
+    window.geometry("1200x860")
     window.configure(bg="black")
 
     title_label = tk.Label(window, text="Spotify Interactive Dashboard", font=("Helvetica", 24, "bold"), fg="#1DB954", bg="black")
@@ -95,130 +116,189 @@ def open_dashboard_window(df):
     frame.pack(padx=20, pady=10)
 
     charts = [
-        ("Listening Timeline", "listening_timeline.png", explore_listening_timeline),
-        ("Top Tracks", "top_tracks_chart.png", explore_top_tracks),
-        ("Top Artists", "top_artists_chart.png", explore_top_artist),
-        ("Top Genres", "top_genres_chart.png", explore_top_genre)
+        ("Listening Timeline", "listening_timeline", explore_listening_timeline),
+        ("Top Tracks", "top_tracks_chart", explore_top_tracks),
+        ("Top Artists", "top_artists_chart", explore_top_artist),
+        ("Top Genres", "top_genres_chart", explore_top_genre)
     ]
 
-    for idx, (title, img_file, explore_func) in enumerate(charts):
-        img = Image.open(img_file)
-        img = img.resize((380, 280))
-        img_tk = ImageTk.PhotoImage(img)
+    # Cards show a blank placeholder until their chart finishes rendering
+    placeholder = tk.PhotoImage(width=DASHBOARD_CHART_SIZE[0], height=DASHBOARD_CHART_SIZE[1])
+    pending = {}
 
+    for idx, (title, chart_name, explore_func) in enumerate(charts):
         card = tk.Frame(frame, bg="black", bd=2, relief="flat")
         card.grid(row=idx // 2, column=idx % 2, padx=20, pady=20)
 
-        img_label = tk.Label(card, image=img_tk, bg="black")
-        img_label.image = img_tk
+        img_label = tk.Label(card, image=placeholder, text="Loading chart...", compound="center",
+                             fg="white", bg="#2e2e2e")
+        img_label.image = placeholder
         img_label.pack()
+        pending[chart_name] = img_label
 
         title_label = tk.Label(card, text=title, font=("Helvetica", 14, "bold"), fg="white", bg="black")
         title_label.pack(pady=5)
 
         explore_button = tk.Button(card, text="Explore More", bg="#1DB954", fg="black", font=("Helvetica", 10),
-                                   command=partial(explore_func, df))
+                                   command=partial(explore_func, catalog))
 
         explore_button.pack(pady=10)
 
-    window.mainloop()
+    button_frame = tk.Frame(window, bg="black")
+    button_frame.pack(pady=10)
+
+    similar_button = tk.Button(button_frame, text="Find Songs Like...", bg="#1DB954", fg="black", font=("Helvetica", 12),
+                               command=partial(explore_similar_songs, catalog))
+    similar_button.pack(side="left", padx=10)
+
+    trends_button = tk.Button(button_frame, text="Genre Trends", bg="#1DB954", fg="black", font=("Helvetica", 12),
+                              command=partial(explore_genre_trends, catalog))
+    trends_button.pack(side="left", padx=10)
+
+    def fill_finished_charts():
+        if not window.winfo_exists():
+            return
+        for chart_name, img_label in list(pending.items()):
+            future = chart_images[chart_name]
+            if not future.done():
+                continue
+            del pending[chart_name]
+            if future.exception() is not None:
+                img_label.configure(text=f"Chart failed:\n{future.exception()}")
+                continue
+            with span("ui.photo_image", chart=chart_name):
+                img_tk = ImageTk.PhotoImage(future.result())
+            img_label.configure(image=img_tk, text="", bg="black")
+            img_label.image = img_tk
+        if pending:
+            window.after(50, fill_finished_charts)
+
+    fill_finished_charts()
 
 # --- EXPLORE FUNCTIONS ---
-def explore_top_artist(df):
+def explore_top_artist(catalog):
     """
     Author: Minh Anh Do
     For each explore button, users will be able to navigate to different graphing features
 
     """
+    df = catalog.df
 
     artist_name = simpledialog.askstring("Explore Top Artist", "Enter artist name:")
     if not artist_name:
         return
-    artist_data = df[df['artist'].str.lower() == artist_name.lower()]
+    with span("catalog.artist_lookup"):
+        artist_data = df.iloc[catalog.index.search_artist_rows(artist_name)]
     if artist_data.empty:
         show_error_popup(f"No songs found for '{artist_name}'")
         return
     result_window = tk.Toplevel()
     result_window.title(f"Songs by {artist_name}")
-    result_window.geometry("700x500")
+    result_window.geometry("900x560")
     result_window.configure(bg="black")
 
     title_label = tk.Label(result_window, text=f"Songs by {artist_name}", font=("Helvetica", 20, "bold"), fg="#1DB954", bg="black")
     title_label.pack(pady=20)
 
-    table_frame = tk.Frame(result_window, bg="black")
-    table_frame.pack(padx=20, pady=10)
+    # Only the visible rows exist as widgets, click a sortable heading to reorder
+    columns = [
+        TableColumn("Song Name", artist_data['song'].to_numpy(), width=300),
+        TableColumn("Artist", artist_data['artist'].to_numpy(), width=160),
+        TableColumn("Popularity", artist_data['popularity'].to_numpy(), width=100, sortable=True, descending_first=True),
+        TableColumn("Year", artist_data['year'].to_numpy(), width=70, sortable=True),
+        TableColumn("Duration", artist_data['duration_ms'].to_numpy(), fmt=format_duration, width=90, sortable=True),
+        TableColumn("Explicit", artist_data['explicit'].to_numpy(), fmt=lambda explicit: "Yes" if explicit else "No", width=80),
+    ]
+    table = VirtualTable(result_window, columns, height=15)
+    table.pack(padx=20, pady=10, fill="both", expand=True)
+
+    tk.Button(result_window, text="Close", command=result_window.destroy, bg="#1DB954", fg="black", font=("Helvetica", 12)).pack(pady=20)
 
-    headers = ["Song Name", "Popularity", "Explicit"]
-    for col, header in enumerate(headers):
-        tk.Label(table_frame, text=header, font=("Helvetica", 14, "bold"), fg="white", bg="black", anchor="w").grid(row=0, column=col, padx=15, pady=5, sticky="w")
+def explore_similar_songs(catalog):
+    """
+    Summary: asks for a song title and lists the catalog songs closest to it in audio
+    attributes. When several songs match the title the most popular one is used.
+    """
+    title = simpledialog.askstring("Songs Like This", "Enter a song title:")
+    if not title:
+        return
+    with span("catalog.song_lookup"):
+        rows = catalog.index.search_song_rows(title)
+    if len(rows) == 0:
+        show_error_popup(f"No song found for '{title}'")
+        return
+    seed = rows[top_k_positions(catalog.df['popularity'].to_numpy()[rows], 1)[0]]
+
+    def find_similar(task):
+        with span("similarity.search"):
+            return similar_songs(catalog, [seed], SIMILAR_SONGS)
+
+    run_in_background(find_similar, on_done=partial(show_similar_songs, catalog, seed))
+
+def show_similar_songs(catalog, seed, recommendations):
+    seed_song = catalog.df['song'].iloc[seed]
+    seed_artist = catalog.df['artist'].iloc[seed]
+    result_window = tk.Toplevel()
+    result_window.title(f"Songs like {seed_song}")
+    result_window.geometry("900x560")
+    result_window.configure(bg="black")
+
+    title_label = tk.Label(result_window, text=f"Songs like {seed_song} by {seed_artist}", font=("Helvetica", 20, "bold"),
+                           fg="#1DB954", bg="black", wraplength=850)
+    title_label.pack(pady=20)
 
-    for idx, (_, row) in enumerate(artist_data.iterrows(), start=1):
-        song_name = row['song']
-        popularity = row['popularity']
-        explicit = "Yes" if row['explicit'] else "No"
-        tk.Label(table_frame, text=song_name, font=("Helvetica", 12), fg="white", bg="black", anchor="w").grid(row=idx, column=0, padx=15, pady=2, sticky="w")
-        tk.Label(table_frame, text=str(popularity), font=("Helvetica", 12), fg="white", bg="black", anchor="w").grid(row=idx, column=1, padx=15, pady=2, sticky="w")
-        tk.Label(table_frame, text=explicit, font=("Helvetica", 12), fg="white", bg="black", anchor="w").grid(row=idx, column=2, padx=15, pady=2, sticky="w")
+    columns = [
+        TableColumn("#", recommendations['rank'].to_numpy(), width=40, sortable=True),
+        TableColumn("Song Name", recommendations['song'].to_numpy(), width=260),
+        TableColumn("Artist", recommendations['artist'].to_numpy(), width=160),
+        TableColumn("Year", recommendations['year'].to_numpy(), width=70, sortable=True),
+        TableColumn("Genre", recommendations['genre'].to_numpy(), width=180),
+        TableColumn("Distance", recommendations['distance'].to_numpy(), fmt=lambda distance: f"{distance:.2f}", width=80, sortable=True),
+    ]
+    table = VirtualTable(result_window, columns, height=15)
+    table.pack(padx=20, pady=10, fill="both", expand=True)
 
     tk.Button(result_window, text="Close", command=result_window.destroy, bg="#1DB954", fg="black", font=("Helvetica", 12)).pack(pady=20)
 
-def explore_top_genre(df):
+def format_duration(duration_ms):
+    minutes, seconds = divmod(int(duration_ms) // 1000, 60)
+    return f"{minutes}:{seconds:02d}"
+
+def explore_top_genre(catalog):
     """
     Author: Minh Anh Do
     For each explore button, users will be able to navigate to different graphing features
 
     """
 
-    period_input = simpledialog.askstring("Explore Top Genre", "Enter a year (e.g., 2015) or decade (e.g., 2010s):")
+    period_input = simpledialog.askstring("Explore Top Genre",
+                                          "Enter a year (e.g., 2015), decade (e.g., 2010s)\nor range of years (e.g., 2005-2012):")
     if not period_input:
         return
     try:
-        if period_input.endswith('s'):
-            decade = int(period_input[:-1])
-            df_period = df[(df['year'] >= decade) & (df['year'] < decade + 10)]
-        else:
-            year = int(period_input)
-            df_period = df[df['year'] == year]
+        start, end = parse_period(period_input)
     except ValueError:
-        show_error_popup("Invalid input! Please enter a valid year or decade.")
+        show_error_popup("Invalid input! Please enter a valid year, decade or range.")
         return
 
-    if df_period.empty:
+    with span("catalog.period_lookup"):
+        songs = catalog.genre_cube.songs(start, end)
+    if songs == 0:
         show_error_popup(f"No data available for '{period_input}'")
         return
 
-    df_period['genre'] = df_period['genre'].astype(str).str.replace(r"[\[\]']", "", regex=True).str.strip()
-    df_period['genre'] = df_period['genre'].str.split(', ')
-    df_exploded = df_period.explode('genre')
-    top_genres = df_exploded['genre'].value_counts().head(10)
-
-    fig, ax = plt.subplots(figsize=(8, 6))
-    top_genres.plot(kind='bar', color=sns.color_palette('deep'), ax=ax)
-    plt.title(f"Top Genres in {period_input}")
-    plt.ylabel("Number of Songs")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    fig.savefig("top_genres_explore.png")
-    plt.close(fig)
-
-    result_window = tk.Toplevel()
-    result_window.title(f"Top Genres in {period_input}")
-    result_window.geometry("750x600")
-    result_window.configure(bg="black")
+    run_in_background(render_chart_task, catalog, "top_genres_explore", {'period': period_input},
+                      partial(draw_top_genres_explore, catalog, period_input),
+                      on_done=partial(show_chart_popup, f"Top Genres in {period_input}"))
 
-    img = Image.open("top_genres_explore.png")
-    img = img.resize((650, 500))
-    img_tk = ImageTk.PhotoImage(img)
 
-    img_label = tk.Label(result_window, image=img_tk, bg="black")
-    img_label.image = img_tk
-    img_label.pack(pady=20)
+def explore_genre_trends(catalog):
+    run_in_background(render_chart_task, catalog, "genre_trends", {'genres': TREND_GENRES},
+                      partial(draw_genre_trends, catalog),
+                      on_done=partial(show_chart_popup, "Genre Trends by Year"))
 
-    close_button = tk.Button(result_window, text="Close", command=result_window.destroy, bg="#1DB954", fg="black", font=("Helvetica", 12))
-    close_button.pack(pady=10)
 
-def explore_listening_timeline(df):
+def explore_listening_timeline(catalog):
     """
     Author: Minh Anh Do
     For each explore button, users will be able to navigate to different graphing features
@@ -226,10 +306,7 @@ def explore_listening_timeline(df):
     """
 
     # List of allowed attributes
-    attributes = [
-        'danceability', 'energy', 'loudness', 'speechiness',
-        'acousticness', 'instrumentalness', 'liveness', 'valence', 'tempo'
-    ]
+    attributes = AUDIO_ATTRIBUTES
 
     # Pop-up asking user for two variables
     var1 = simpledialog.askstring(
@@ -248,39 +325,13 @@ def explore_listening_timeline(df):
         show_error_popup("Invalid second variable selected!")
         return
 
-    # Scatterplot
-    fig, ax = plt.subplots(figsize=(8, 6))
-    sns.scatterplot(data=df, x=var1, y=var2, alpha=0.6)
-    plt.title(f"Relationship Between {var1.capitalize()} and {var2.capitalize()}")
-    plt.xlabel(var1.capitalize())
-    plt.ylabel(var2.capitalize())
-    plt.grid(True)
-    plt.tight_layout()
+    # Scatterplot, rendered off the Tk thread and shown in a popup window
+    run_in_background(render_chart_task, catalog, "relationship_plot", {'x': var1, 'y': var2},
+                      partial(draw_relationship_plot, catalog, var1, var2),
+                      on_done=partial(show_chart_popup, f"{var1.capitalize()} vs {var2.capitalize()}"))
 
-    # Save figure
-    fig.savefig("relationship_plot.png")
-    plt.close(fig)
-
-    # Show in popup window
-    result_window = tk.Toplevel()
-    result_window.title(f"{var1.capitalize()} vs {var2.capitalize()}")
-    result_window.geometry("750x600")
-    result_window.configure(bg="black")
-
-    img = Image.open("relationship_plot.png")
-    img = img.resize((650, 500))
-    img_tk = ImageTk.PhotoImage(img)
-
-    img_label = tk.Label(result_window, image=img_tk, bg="black")
-    img_label.image = img_tk
-    img_label.pack(pady=20)
-
-    close_button = tk.Button(result_window, text="Close", command=result_window.destroy,
-                             bg="#1DB954", fg="black", font=("Helvetica", 12))
-    close_button.pack(pady=10)
 
-
-def explore_top_tracks(df):
+def explore_top_tracks(catalog):
     """
     Author: Minh Anh Do
     For each explore button, users will be able to navigate to different graphing features
@@ -306,76 +357,95 @@ def explore_top_tracks(df):
     info_window.wait_window()  # Pause here until the user closes the info window
 
     # Now ask the user for input
-    attributes = ['danceability', 'energy', 'loudness', 'speechiness', 'acousticness',
-                  'instrumentalness', 'liveness', 'valence', 'tempo']
+    attributes = AUDIO_ATTRIBUTES
 
     attr = simpledialog.askstring("Select Attribute", f"Choose an attribute:\n{', '.join(attributes)}")
     if not attr or attr not in attributes:
         show_error_popup("Invalid attribute selected!")
         return
 
+    level_input = simpledialog.askstring("Select Level", f"How much {attr} should the song have?\n{', '.join(LEVELS)}")
+    if not level_input or level_input.strip().lower() not in LEVELS:
+        show_error_popup(f"Invalid level! Must be one of: {', '.join(LEVELS)}.")
+        return
+    level = LEVELS.index(level_input.strip().lower())
+
     mode = simpledialog.askstring("Probability Type", "Type 'artist' to analyze by artist,\nor 'period' to analyze by year or decade:")
     if not mode or mode.lower() not in ['artist', 'period']:
         show_error_popup("Invalid choice! Must be 'artist' or 'period'.")
         return
+    mode = mode.lower()
 
-    if mode.lower() == 'artist':
+    if mode == 'artist':
         target = simpledialog.askstring("Target Artist", "Enter the artist name:")
         if not target:
             show_error_popup("No artist entered!")
             return
-        subset = df[df['artist'].str.lower() == target.lower()]
+        artist_codes = catalog.index.artist_codes(target)
+        if not artist_codes:
+            show_error_popup(f"No matching songs found for '{target}'!")
+            return
     else:
-        period_input = simpledialog.askstring("Target Period", "Enter a year (e.g., 2015) or decade (e.g., 2010s):")
-        if not period_input:
+        target = simpledialog.askstring("Target Period", "Enter a year (e.g., 2015) or decade (e.g., 2010s):")
+        if not target:
             show_error_popup("No period entered!")
             return
         try:
-            if period_input.endswith('s'):
-                decade = int(period_input[:-1])
-                subset = df[(df['year'] >= decade) & (df['year'] < decade + 10)]
-            else:
-                year = int(period_input)
-                subset = df[df['year'] == year]
+            start, end = parse_period(target)
         except ValueError:
             show_error_popup("Invalid period input!")
             return
 
-    # Now filter songs that meet the attribute condition
-    attr_values = df[attr].dropna()
-
-    # Overall probability: choosing a random song from the whole dataset
-    total_songs = len(df)
-
-    # Conditional probability: choosing a song that matches user condition
-    matching_songs = len(subset)
-
-    if matching_songs == 0:
-        show_error_popup(f"No matching songs found for '{target if mode=='artist' else period_input}'!")
-        return
-
-    probability = matching_songs / total_songs
-
-    # Show result
-    result_window = tk.Toplevel()
-    result_window.title("Probability Result")
-    result_window.geometry("600x300")
-    result_window.configure(bg="black")
-
-    result_text = (f"Conditional Probability Result\n\n"
-                   f"Selected attribute: {attr}\n"
-                   f"Mode: {mode.title()}\n"
-                   f"Target: {target if mode == 'artist' else period_input}\n\n"
-                   f"Probability = {matching_songs} / {total_songs}\n\n"
-                   f"≈ {probability:.4f}")
-
-    result_label = tk.Label(result_window, text=result_text, font=("Helvetica", 14),
-                            fg="#1DB954", bg="black", wraplength=550, justify="center")
-    result_label.pack(pady=40)
+    def compute_probability(task):
+        # The count tables are built once per catalog, every lookup after that is O(1)
+        with span("probability.tables"):
+            tables = catalog.probability_tables
+        with span("probability.lookup", mode=mode):
+            if mode == 'artist':
+                matches, in_bin = tables.artist_given_bin(attr, level, [artist_codes])
+                overall = tables.artist_overall([artist_codes])
+            else:
+                matches, in_bin = tables.period_given_bin(attr, level, [start], [end])
+                overall = tables.period_overall([start], [end])
+        return (int(matches[0]), int(in_bin), int(overall[0]), tables.n_songs, tables.bin_range(attr, level),
+                tables.level_label(attr, level))
+
+    def show_probability(result):
+        matching_songs, songs_in_bin, target_songs, total_songs, (low, high), level_name = result
+        if target_songs == 0:
+            show_error_popup(f"No matching songs found for '{target}'!")
+            return
+        if songs_in_bin == 0:
+            show_error_popup(f"No songs have {level_name} {attr}!")
+            return
 
-    close_button = tk.Button(result_window, text="Close", bg="#1DB954", fg="black",
-                             font=("Helvetica", 12), command=result_window.destroy)
-    close_button.pack(pady=10)
+        probability = matching_songs / songs_in_bin
+        baseline = target_songs / total_songs
+
+        # Show result
+        result_window = tk.Toplevel()
+        result_window.title("Probability Result")
+        result_window.geometry("600x420")
+        result_window.configure(bg="black")
+
+        result_text = (f"Conditional Probability Result\n\n"
+                       f"Selected attribute: {attr} is {level_name} ({low:.3g} to {high:.3g})\n"
+                       f"Mode: {mode.title()}\n"
+                       f"Target: {target}\n\n"
+                       f"P(target | {level_name} {attr}) = {matching_songs} / {songs_in_bin}\n"
+                       f"≈ {probability:.4f}\n\n"
+                       f"P(target) over all songs = {target_songs} / {total_songs}\n"
+                       f"≈ {baseline:.4f}")
+
+        result_label = tk.Label(result_window, text=result_text, font=("Helvetica", 14),
+                                fg="#1DB954", bg="black", wraplength=550, justify="center")
+        result_label.pack(pady=30)
+
+        close_button = tk.Button(result_window, text="Close", bg="#1DB954", fg="black",
+                                 font=("Helvetica", 12), command=result_window.destroy)
+        close_button.pack(pady=10)
+
+    run_in_background(compute_probability, on_done=show_probability)
 
 
 # --- ERROR HANDLER ---
@@ -1,83 +1,226 @@
 import json
+import zipfile
 import tkinter as tk
 from tkinter import filedialog
-import pandas as pd
-import matplotlib.pyplot as plt
-from PIL import Image, ImageTk
+from PIL import ImageTk
+from history_loader import load_history
+from aggregation import PlayAggregates
+from temporal import ListeningTimeline
+from catalog_cache import load_catalog
+from history_join import match_history
+from similarity import recommend_for_history
+from history_store import HistoryStore
+from history_charts import draw_artist_totals, draw_listening_patterns, draw_music_profile
+from render_cache import figure_to_image, ask_export_png
+from tasks import TaskCancelled, run_in_background
+from table_view import TableColumn, VirtualTable
+from instrumentation import span, traced
 
 
+def ask_export_path():
+    return filedialog.askopenfilename(
+        title="Select your Spotify JSON File",
+        filetypes=(("Spotify Export", "*.json *.zip"), ("JSON Files", "*.json"), ("Zip Archives", "*.zip"))
+    )
+
 
-def import_json_from_user():
+def import_json_from_user(file_path=None, task=None):
     """
     Author: Samantha Cuenot
-    Summary: takes user spotify input and converts it to json
+    Summary: takes user spotify input and loads it as a columnar StreamingHistory.
+    Picking one StreamingHistory shard loads all of its siblings, a zip export is read directly.
+    When running as a background task, progress is reported and cancellation checked after every batch
     """
-    file_path = filedialog.askopenfilename(
-        title="Select your Spotify JSON File",
-        filetypes=(("JSON Files", "*.json"),)
-    )
+    if file_path is None:
+        file_path = ask_export_path()
     if not file_path:
         return None
 
+    def on_batch(count):
+        if task is not None:
+            task.check_cancelled()
+            task.report(f"Loaded {count:,} plays...")
+
     try:
-        with open(file_path, 'r') as file:
-            data = json.load(file)
-            return data
+        with span("history.load"):
+            data = load_history(file_path, on_batch=on_batch)
+        return data if len(data) else None
+    except TaskCancelled:
+        raise
     except FileNotFoundError:
         print("Error: File not found")
         return None
     except json.JSONDecodeError:
         print("Error: Invalid JSON")
         return None
+    except zipfile.BadZipFile:
+        print("Error: Invalid zip archive")
+        return None
     except Exception as e:
         print("Error: " + str(e))
         return None
 
 
-def plot_top_artists(data, top_n = 10):
+def render_top_artists(data, top_n = 10):
     """
     Author: Samantha Cuenot
-    Summary: takes user spotify data and plots top n artists based on the ms streamed
+    Summary: takes user spotify data and charts top n artists based on the ms streamed, returns the rendered image.
+    Uses a standalone Figure so it can run off the Tk thread
+    """
+    return render_artist_totals(PlayAggregates(data).artist_totals(), top_n)
+
+
+@traced("history.render_top_artists")
+def render_artist_totals(totals, top_n = 10):
+    """
+    Summary: charts the top n artists of a per-artist msPlayed table (PlayAggregates or HistoryStore rollup)
+    """
+    return figure_to_image(draw_artist_totals(totals, top_n), (800, 600))
+
+
+def listening_patterns_task(task):
+    """
+    Summary: background task charting the listening patterns of everything in the history store
+    """
+    with span("history.timeline"):
+        timeline = ListeningTimeline(HistoryStore().history())
+    task.check_cancelled()
+    return figure_to_image(draw_listening_patterns(timeline), (800, 600))
+
+
+def show_listening_patterns(image):
+    show_chart_window("Your Listening Patterns", image, "listening_patterns.png")
+
+
+def music_profile_task(task, csv_path = "songs_normalize.csv"):
+    """
+    Summary: background task joining everything in the history store to the songs catalog
+    and charting the genre and audio profile of the matched listening
+    """
+    task.report("Reading songs catalog...")
+    catalog = load_catalog(csv_path)
+    task.check_cancelled()
+    task.report("Matching your plays to the catalog...")
+    with span("history.match_catalog"):
+        match = match_history(HistoryStore().history(), catalog, fuzzy=True)
+    task.check_cancelled()
+    return figure_to_image(draw_music_profile(match.genre_profile(), match.audio_profile(), match.coverage()),
+                           (800, 600))
+
+
+def show_music_profile(image):
+    show_chart_window("Your Music Profile", image, "music_profile.png")
+
+
+def recommendations_task(task, csv_path = "songs_normalize.csv"):
+    """
+    Summary: background task finding the catalog songs closest in audio attributes
+    to the mix of the user's most played songs
     """
-    artist_listen_time = {}
+    task.report("Reading songs catalog...")
+    catalog = load_catalog(csv_path)
+    task.check_cancelled()
+    task.report("Finding songs like your favourites...")
+    with span("history.recommendations"):
+        mix, _ = recommend_for_history(HistoryStore().history(), catalog, k=20)
+    return mix
+
 
-    for entry in data:
-        artist = entry['artistName']
-        ms_played = entry['msPlayed']
-        if artist in artist_listen_time:
-            artist_listen_time[artist] += ms_played
-        else:
-            artist_listen_time[artist] = ms_played
+def show_recommendations(recommendations):
+    window = tk.Toplevel()
+    window.title("Songs For You")
+    window.geometry("850x560")
+    window.configure(bg="#2e2e2e")
 
-    # Convert the ms to hours
-    artist_hours = {artist: ms / (1000 * 60 * 60) for artist, ms in artist_listen_time.items()}
-    artist_df = pd.DataFrame(list(artist_hours.items()), columns=['Artist', 'HoursListened'])
-    artist_df.sort_values('HoursListened', ascending=False, inplace=True)
+    if recommendations.empty:
+        text = "None of your plays matched the songs catalog, so there is nothing to compare with yet."
+    else:
+        text = "Catalog songs closest in sound to the songs you play the most"
+    tk.Label(window, text=text, font=("Helvetica", 14, "bold"), fg="white", bg="#2e2e2e", wraplength=800).pack(pady=20)
 
-    top_artists = artist_df.head(top_n)
+    columns = [
+        TableColumn("#", recommendations['rank'].to_numpy(), width=40, sortable=True),
+        TableColumn("Song Name", recommendations['song'].to_numpy(), width=260),
+        TableColumn("Artist", recommendations['artist'].to_numpy(), width=160),
+        TableColumn("Year", recommendations['year'].to_numpy(), width=70, sortable=True),
+        TableColumn("Genre", recommendations['genre'].to_numpy(), width=200),
+    ]
+    table = VirtualTable(window, columns, height=15)
+    table.pack(padx=20, pady=10, fill="both", expand=True)
 
-    fig, ax = plt.subplots(figsize=(10, 8))
-    ax.barh(top_artists['Artist'], top_artists['HoursListened'])
-    ax.set_xlabel('Hours Listened')
-    ax.set_ylabel(f'Top {top_n} Listened to Artists by You')
-    ax.invert_yaxis()
-    fig.tight_layout()
+    tk.Button(window, text="Close", bg="#2e7d32", fg="white", font=("Helvetica", 12), command=window.destroy).pack(pady=10)
 
-    fig.savefig('top_artists_plot.png')
-    plt.close(fig)
 
+def show_top_artists(image):
+    img_window = show_chart_window("Your Spotify Top Artists", image, "top_artists_plot.png")
+    patterns_button = tk.Button(img_window.button_frame, text="Listening Patterns", bg="#2e7d32", fg="white",
+                                font=("Helvetica", 12),
+                                command=lambda: run_in_background(listening_patterns_task, on_done=show_listening_patterns,
+                                                                  title="Charting your listening patterns", widget=img_window))
+    patterns_button.pack(side="left", padx=10)
+    profile_button = tk.Button(img_window.button_frame, text="Music Profile", bg="#2e7d32", fg="white",
+                               font=("Helvetica", 12),
+                               command=lambda: run_in_background(music_profile_task, on_done=show_music_profile,
+                                                                 title="Building your music profile", widget=img_window))
+    profile_button.pack(side="left", padx=10)
+    recommend_button = tk.Button(img_window.button_frame, text="Songs For You", bg="#2e7d32", fg="white",
+                                 font=("Helvetica", 12),
+                                 command=lambda: run_in_background(recommendations_task, on_done=show_recommendations,
+                                                                   title="Finding songs for you", widget=img_window))
+    recommend_button.pack(side="left", padx=10)
+
+
+def show_chart_window(title, image, filename):
     img_window = tk.Toplevel()
-    img_window.title("Your Spotify Top Artists")
-    img_window.geometry("850x700")
+    img_window.title(title)
+    img_window.geometry("850x740")
     img_window.configure(bg="#2e2e2e")
 
-    img = Image.open("top_artists_plot.png")
-    img = img.resize((800, 600))
-    img_tk = ImageTk.PhotoImage(img)
+    img_tk = ImageTk.PhotoImage(image)
 
     label = tk.Label(img_window, image=img_tk, bg="#2e2e2e")
     label.image = img_tk
     label.pack(pady=20)
 
-    close_button = tk.Button(img_window, text="Close", bg="2e7d32", fg="white", font=("Helvetica", 12), command=img_window.destroy)
-    close_button.pack(pady=10)
+    button_frame = tk.Frame(img_window, bg="#2e2e2e")
+    button_frame.pack(pady=10)
+
+    save_button = tk.Button(button_frame, text="Save as PNG", bg="#2e7d32", fg="white", font=("Helvetica", 12),
+                            command=lambda: ask_export_png(image, filename))
+    save_button.pack(side="left", padx=10)
+
+    close_button = tk.Button(button_frame, text="Close", bg="#2e7d32", fg="white", font=("Helvetica", 12), command=img_window.destroy)
+    close_button.pack(side="left", padx=10)
+    img_window.button_frame = button_frame
+    return img_window
+
+
+def plot_top_artists(data, top_n = 10):
+    """
+    Author: Samantha Cuenot
+    Summary: takes user spotify data and plots top n artists based on the ms streamed
+    """
+    show_top_artists(render_top_artists(data, top_n))
+
+
+def analyze_history_task(task, file_path, top_n = 10):
+    """
+    Summary: background task behind "Analyze Your Own Data": loads the export, merges it into
+    the local history store and charts the top artists over everything imported so far.
+    Returns the rendered image or None when nothing could be loaded
+    """
+    data = import_json_from_user(file_path, task)
+    if not data:
+        return None
+
+    # Only plays that are new to the local history store are added to its rollups
+    task.report("Merging into your listening history...")
+    with span("history.store_import", plays=len(data)):
+        store = HistoryStore()
+        store.import_history(data)
+    task.check_cancelled()
+
+    task.report("Charting your top artists...")
+    with span("history.store_totals"):
+        totals = store.artist_totals()
+    return render_artist_totals(totals, top_n)
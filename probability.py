@@ -0,0 +1,136 @@
+import numpy as np
+from density import AUDIO_ATTRIBUTES
+
+
+LEVELS = ['low', 'medium-low', 'medium-high', 'high']
+
+
+def quantile_bins(values, n_levels):
+    """
+    Summary: splits values at their n_levels quantiles, every value going by value
+    alone so equal values always share a bin. Returns (bin of every value,
+    bin of every level, (bins, 2) lowest and highest value per bin). When quantiles
+    coincide, as with many songs at exactly 0, the levels between them share one bin
+    and there are fewer bins than levels.
+    """
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int64), np.zeros(n_levels, dtype=np.int64), np.full((1, 2), np.nan)
+    # Quantiles taken at data values, so every bin a level maps to holds at least one song
+    edges = np.quantile(values, np.linspace(0, 1, n_levels + 1), method='inverted_cdf')
+    cuts = np.unique(edges[1:-1])
+    # A value equal to a cut belongs to the bin below it, like the quantile it equals
+    bins = np.searchsorted(cuts, values, side='left')
+    level_bins = np.searchsorted(cuts, edges[1:], side='left')
+
+    sorted_values = np.sort(values)
+    bounds = np.searchsorted(sorted_values, cuts, side='right')
+    starts, ends = np.r_[0, bounds], np.r_[bounds, len(values)]
+    ranges = np.full((len(cuts) + 1, 2), np.nan)
+    filled = ends > starts
+    ranges[filled, 0] = sorted_values[starts[filled]]
+    ranges[filled, 1] = sorted_values[ends[filled] - 1]
+    return bins, level_bins, ranges
+
+
+class ProbabilityTables:
+    """
+    Summary: count tables for conditional probabilities over the catalog.
+    Every audio attribute is split once at its quantiles into LEVELS, songs with equal
+    values always landing in the same bin (levels whose quantiles coincide share one),
+    then songs are counted per (bin, artist) and per (bin, year). With cumulative sums over the
+    year axis, P(artist | bin) and P(period | bin) are a couple of array lookups,
+    and many targets can be looked up at once by passing arrays.
+    """
+
+    def __init__(self, catalog, attributes=AUDIO_ATTRIBUTES, n_levels=len(LEVELS)):
+        df = catalog.df
+        self.n_levels = n_levels
+        self.n_songs = len(df)
+        self.n_artists = len(df['artist'].cat.categories)
+        artist_codes = df['artist'].cat.codes.to_numpy().astype(np.int64)
+
+        years = df['year'].to_numpy().astype(np.int64)
+        self.first_year = int(years.min()) if len(years) else 0
+        self.n_years = int(years.max()) - self.first_year + 1 if len(years) else 0
+        year_codes = years - self.first_year
+
+        self.artist_song_counts = np.bincount(artist_codes, minlength=self.n_artists)
+        self.year_song_cumsum = np.concatenate([[0], np.cumsum(np.bincount(year_codes, minlength=self.n_years))])
+
+        self.level_bins = {}
+        self.ranges = {}
+        self.bin_totals = {}
+        self.artist_counts = {}
+        self.year_cumsum = {}
+        for attribute in attributes:
+            values = df[attribute].to_numpy(dtype=np.float64)
+            bins, level_bins, ranges = quantile_bins(values, n_levels)
+            n_bins = len(ranges)
+            self.level_bins[attribute] = level_bins
+            self.ranges[attribute] = ranges
+            self.bin_totals[attribute] = np.bincount(bins, minlength=n_bins)
+            self.artist_counts[attribute] = np.bincount(
+                bins * self.n_artists + artist_codes, minlength=n_bins * self.n_artists).reshape(n_bins, self.n_artists)
+            year_counts = np.bincount(bins * self.n_years + year_codes,
+                                      minlength=n_bins * self.n_years).reshape(n_bins, self.n_years)
+            self.year_cumsum[attribute] = np.concatenate(
+                [np.zeros((n_bins, 1), dtype=np.int64), np.cumsum(year_counts, axis=1)], axis=1)
+
+    @staticmethod
+    def _sum_codes(counts, artist_codes):
+        # A flat array is one code per target, a nested list groups several codes per target
+        if isinstance(artist_codes, np.ndarray) and artist_codes.ndim == 1:
+            return counts[artist_codes.astype(np.int64)]
+        return np.array([counts[np.asarray(codes, dtype=np.int64)].sum() for codes in artist_codes])
+
+    def levels(self, attribute):
+        """
+        Summary: (bin, level names) of every bin of the attribute, lowest first.
+        A bin holds several names when their quantiles coincided.
+        """
+        level_bins = self.level_bins[attribute]
+        return [(int(b), [LEVELS[level] for level in np.flatnonzero(level_bins == b)]) for b in np.unique(level_bins)]
+
+    def level_label(self, attribute, level):
+        """
+        Summary: the level's name, "low to medium-low" style when it shares its bin with others
+        """
+        names = dict(self.levels(attribute))[int(self.level_bins[attribute][level])]
+        return names[0] if len(names) == 1 else f"{names[0]} to {names[-1]}"
+
+    def bin_range(self, attribute, level):
+        """
+        Summary: (lowest, highest) value of the attribute among the songs of the level
+        """
+        low, high = self.ranges[attribute][self.level_bins[attribute][level]]
+        return low, high
+
+    def artist_given_bin(self, attribute, level, artist_codes):
+        """
+        Summary: (matching songs, songs in the bin) for each artist code, where a
+        target can be one code or a list of codes (one artist spelled several ways)
+        """
+        b = self.level_bins[attribute][level]
+        matches = self._sum_codes(self.artist_counts[attribute][b], artist_codes)
+        return matches, self.bin_totals[attribute][b]
+
+    def _year_positions(self, starts, ends):
+        starts = np.clip(np.asarray(starts, dtype=np.int64) - self.first_year, 0, self.n_years)
+        ends = np.clip(np.asarray(ends, dtype=np.int64) - self.first_year, 0, self.n_years)
+        return starts, np.maximum(ends, starts)
+
+    def period_given_bin(self, attribute, level, starts, ends):
+        """
+        Summary: (matching songs, songs in the bin) for each [start, end) year range
+        """
+        starts, ends = self._year_positions(starts, ends)
+        b = self.level_bins[attribute][level]
+        cumsum = self.year_cumsum[attribute][b]
+        return cumsum[ends] - cumsum[starts], self.bin_totals[attribute][b]
+
+    def artist_overall(self, artist_codes):
+        return self._sum_codes(self.artist_song_counts, artist_codes)
+
+    def period_overall(self, starts, ends):
+        starts, ends = self._year_positions(starts, ends)
+        return self.year_song_cumsum[ends] - self.year_song_cumsum[starts]
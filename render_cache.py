@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+from instrumentation import span
+
+
+CACHE_DIR = ".chart_cache"
+MAX_MEMORY_ITEMS = 32
+MAX_DISK_BYTES = 64 * 1024 * 1024
+# Bump when a chart's drawing changes so images rendered by older code are not reused
+RENDER_VERSION = 3
+
+
+def figure_to_image(fig, size):
+    """
+    Summary: draws a matplotlib figure straight into an RGBA buffer of exactly
+    size = (width, height) pixels and returns it as a PIL image. The figure is laid
+    out at the target size, so nothing is encoded, written to disk or resampled.
+    """
+    width, height = size
+    with span("render.draw", size=f"{width}x{height}"):
+        fig.set_size_inches(width / fig.dpi, height / fig.dpi)
+        canvas = FigureCanvasAgg(fig)
+        fig.tight_layout()
+        canvas.draw()
+    with span("render.to_image"):
+        return Image.frombuffer('RGBA', canvas.get_width_height(), bytes(canvas.buffer_rgba()), 'raw', 'RGBA', 0, 1)
+
+
+def export_png(image, path):
+    """
+    Summary: saves a rendered chart as PNG, only done when the user asks for it
+    """
+    image.save(path, format='PNG')
+
+
+def ask_export_png(image, initialfile="chart.png"):
+    # Imported here so the headless report and the pool workers never load Tk
+    from tkinter import filedialog
+
+    path = filedialog.asksaveasfilename(title="Save chart as PNG", initialfile=initialfile,
+                                        defaultextension=".png", filetypes=(("PNG Images", "*.png"),))
+    if path:
+        export_png(image, path)
+
+
+class RenderCache:
+    """
+    Summary: LRU cache of rendered charts keyed by (dataset fingerprint, chart, parameters, size).
+    Recently used charts are kept in memory as RGBA images ready for display, every chart
+    is also written to cache_dir as PNG so later runs reuse it. The disk cache evicts the
+    least recently used files once it grows past max_disk_bytes.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_memory_items=MAX_MEMORY_ITEMS, max_disk_bytes=MAX_DISK_BYTES):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(fingerprint, chart, params=None, size=None):
+        payload = json.dumps([RENDER_VERSION, fingerprint, chart, params or {}, size], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        path = self._path(key)
+        try:
+            with Image.open(path) as png, span("render_cache.load_png"):
+                image = png.convert('RGBA')
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # the file mtime is the disk LRU clock
+        except FileNotFoundError:
+            pass  # evicted by another thread since it was read, the image is still good
+        self._remember(key, image)
+        return image
+
+    def put(self, key, image):
+        self._remember(key, image)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with span("render_cache.save_png"):
+            image.save(tmp_path, format='PNG', compress_level=1)
+            os.replace(tmp_path, self._path(key))
+        self._evict_disk()
+
+    def _remember(self, key, image):
+        with self._lock:
+            self._memory[key] = image
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        entries = []
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if entry.name.endswith(".png"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def render(self, fingerprint, chart, params, draw, size):
+        """
+        Summary: returns the cached RGBA image of the chart at size, calling draw()
+        to build the figure only on a miss
+        """
+        key = self.key(fingerprint, chart, params, size)
+        image = self.get(key)
+        if image is None:
+            image = figure_to_image(draw(), size)
+            self.put(key, image)
+        return image
+
+
+chart_cache = RenderCache()
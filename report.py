@@ -0,0 +1,222 @@
+"""
+Headless report generation: renders every dashboard and explore chart of a songs
+catalog, plus the top artists, listening patterns and music profile of any number of
+streaming history exports, into an output directory together with CSV summary tables
+and song recommendations.
+No Tk window is created, charts are drawn with the Agg backend on a process pool.
+
+    python report.py songs_normalize.csv StreamingHistory_music_0.json -o reports
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import as_completed
+import numpy as np
+import pandas as pd
+from catalog_cache import load_catalog
+from chart_workers import MAX_WORKERS, create_pool, draw_in_worker
+from density import AUDIO_ATTRIBUTES
+from history_loader import load_history
+from aggregation import PlayAggregates, to_hours
+from temporal import ListeningTimeline
+from history_join import match_history
+from similarity import recommend_for_match
+from topk import top_k_per_group, top_k_positions
+from catalog_charts import DASHBOARD_CHARTS
+
+CHART_SIZE = (800, 600)
+TOP_N = 10
+
+
+def decades(catalog):
+    years = catalog.df['year'].to_numpy()
+    return [f"{decade}s" for decade in np.unique(years // 10 * 10)]
+
+
+def catalog_chart_jobs(catalog, output_dir):
+    """
+    Summary: (path, module, function, args) of every catalog chart: the dashboard,
+    top genres per decade, genre trends and the relationship plot of every pair of
+    audio attributes
+    """
+    jobs = [(os.path.join(output_dir, f"{name}.png"), "catalog_charts", draw.__name__, ())
+            for name, draw in DASHBOARD_CHARTS.items()]
+    for period in decades(catalog):
+        jobs.append((os.path.join(output_dir, f"top_genres_{period}.png"), "catalog_charts", "draw_top_genres_explore",
+                     (period,)))
+    jobs.append((os.path.join(output_dir, "genre_trends.png"), "catalog_charts", "draw_genre_trends", ()))
+    for i, x in enumerate(AUDIO_ATTRIBUTES):
+        for y in AUDIO_ATTRIBUTES[i + 1:]:
+            jobs.append((os.path.join(output_dir, f"relationship_{x}_{y}.png"), "catalog_charts", "draw_relationship_plot",
+                         (x, y)))
+    return jobs
+
+
+def write_catalog_tables(catalog, output_dir):
+    df = catalog.df
+    artists = df.groupby('artist', observed=True).agg(
+        songs=('song', 'size'), mean_popularity=('popularity', 'mean'),
+        first_year=('year', 'min'), last_year=('year', 'max'))
+    artists.sort_values('mean_popularity', ascending=False).to_csv(os.path.join(output_dir, "artists.csv"))
+
+    cube = catalog.genre_cube
+    genres = pd.DataFrame({period: cube.period_counts(period) for period in decades(catalog)})
+    genres.fillna(0).astype(np.int64).rename_axis('genre').to_csv(os.path.join(output_dir, "genres_by_decade.csv"))
+    cube.trend().to_csv(os.path.join(output_dir, "genres_by_year.csv"))
+
+    # The most popular songs of every release year, all years ranked in one pass
+    years = df['year'].to_numpy().astype(np.int64)
+    first_year = years.min() if len(years) else 0
+    rows, year_codes, ranks = top_k_per_group(years - first_year, df['popularity'].to_numpy(), TOP_N)
+    pd.DataFrame({'year': year_codes + first_year, 'rank': ranks + 1, 'artist': df['artist'].to_numpy()[rows],
+                  'song': df['song'].to_numpy()[rows], 'popularity': df['popularity'].to_numpy()[rows]}
+                 ).to_csv(os.path.join(output_dir, "top_songs_by_year.csv"), index=False)
+
+    # The artists most represented in every level of every audio attribute
+    tables = catalog.probability_tables
+    artist_names = df['artist'].cat.categories
+    rows = []
+    for attribute in AUDIO_ATTRIBUTES:
+        # Levels whose quantiles coincide share one bin, written once under their joined names
+        for b, level_names in tables.levels(attribute):
+            level_name = "/".join(level_names)
+            counts = tables.artist_counts[attribute][b]
+            low, high = tables.ranges[attribute][b]
+            total = tables.bin_totals[attribute][b]
+            for rank, code in enumerate(top_k_positions(counts, 5), start=1):
+                if counts[code] == 0:
+                    break
+                rows.append({'attribute': attribute, 'level': level_name, 'low': low, 'high': high, 'rank': rank,
+                             'artist': artist_names[code], 'songs': int(counts[code]), 'share': counts[code] / total})
+    pd.DataFrame(rows).to_csv(os.path.join(output_dir, "audio_levels_top_artists.csv"), index=False)
+    return ["artists.csv", "genres_by_decade.csv", "genres_by_year.csv", "top_songs_by_year.csv",
+            "audio_levels_top_artists.csv"]
+
+
+def write_history_tables(history, output_dir):
+    aggregates = PlayAggregates(history)
+    tables = {
+        "top_artists.csv": aggregates.artist_totals(),
+        "top_tracks.csv": aggregates.track_totals(),
+        "daily.csv": aggregates.daily_totals(),
+        "hourly.csv": aggregates.hourly_totals(),
+    }
+    timeline = ListeningTimeline(history)
+    tables.update({
+        "weekly.csv": timeline.weekly_totals(),
+        "sessions.csv": timeline.sessions(),
+        "skip_rates.csv": timeline.skip_rates(),
+    })
+    for name, table in tables.items():
+        if 'msPlayed' in table:
+            table = table.assign(hours=to_hours(table['msPlayed'].to_numpy()))
+        if name.startswith("top_"):
+            table = table.sort_values('msPlayed', ascending=False)
+        table.to_csv(os.path.join(output_dir, name))
+    return aggregates.artist_totals(), timeline, list(tables)
+
+
+def write_user_report(history_path, catalog, user_dir):
+    """
+    Summary: writes the tables of one streaming history export into user_dir and returns
+    (its manifest entry, chart path -> (history_charts function, args) still to render)
+    """
+    history = load_history(history_path)
+    os.makedirs(user_dir, exist_ok=True)
+    artist_totals, timeline, tables = write_history_tables(history, user_dir)
+
+    # The user's listening joined to the catalog: genre and audio attribute profile
+    match = match_history(history, catalog, fuzzy=True)
+    genres, audio, coverage = match.genre_profile(), match.audio_profile(), match.coverage()
+    genres.rename_axis('genre').to_csv(os.path.join(user_dir, "genre_profile.csv"))
+    audio.to_csv(os.path.join(user_dir, "audio_profile.csv"))
+    tables += ["genre_profile.csv", "audio_profile.csv"]
+
+    # Catalog songs closest in audio attributes to the user's most played songs
+    mix, per_song = recommend_for_match(match, k=TOP_N)
+    mix.drop(columns='row').to_csv(os.path.join(user_dir, "recommendations.csv"), index=False)
+    per_song.drop(columns='row').to_csv(os.path.join(user_dir, "similar_to_top_songs.csv"), index=False)
+    tables += ["recommendations.csv", "similar_to_top_songs.csv"]
+
+    user = {'source': history_path, 'plays': len(history), 'catalog_match': coverage, 'tables': tables}
+    charts = {
+        os.path.join(user_dir, "top_artists.png"): ("draw_artist_totals", (artist_totals, TOP_N)),
+        os.path.join(user_dir, "listening_patterns.png"): ("draw_listening_patterns", (timeline,)),
+        os.path.join(user_dir, "music_profile.png"): ("draw_music_profile", (genres, audio, coverage)),
+    }
+    return user, charts
+
+
+def export_name(path, taken):
+    name = os.path.splitext(os.path.basename(os.path.normpath(path)))[0] or "export"
+    unique, suffix = name, 2
+    while unique in taken:
+        unique, suffix = f"{name}_{suffix}", suffix + 1
+    taken.add(unique)
+    return unique
+
+
+def run_report(csv_path, history_paths, output_dir, workers=MAX_WORKERS, log=print):
+    """
+    Summary: writes the full report and returns its manifest (also saved as report.json).
+    Tables are written by this process while the pool renders charts.
+    """
+    catalog = load_catalog(csv_path)
+    catalog_dir = os.path.join(output_dir, "catalog")
+    os.makedirs(catalog_dir, exist_ok=True)
+
+    manifest = {'catalog': csv_path, 'charts': [], 'tables': [], 'users': {}, 'errors': []}
+    with create_pool(workers) as pool:
+        futures = {}
+        for path, module, function, args in catalog_chart_jobs(catalog, catalog_dir):
+            futures[pool.submit(draw_in_worker, catalog.cache_path, module, function, args, CHART_SIZE, path)] = path
+
+        manifest['tables'] += [os.path.join("catalog", name) for name in write_catalog_tables(catalog, catalog_dir)]
+
+        names = set()
+        for history_path in history_paths:
+            name = export_name(history_path, names)
+            # One broken or unusual export only loses its own part of the report
+            try:
+                user, user_charts = write_user_report(history_path, catalog, os.path.join(output_dir, "users", name))
+            except Exception as e:
+                manifest['errors'].append(f"{history_path}: {e}")
+                log(f"Skipping {history_path}: {e}")
+                continue
+            user['tables'] = [os.path.join("users", name, table) for table in user['tables']]
+            manifest['users'][name] = user
+            for chart_path, (function, args) in user_charts.items():
+                futures[pool.submit(draw_in_worker, None, "history_charts", function, args, CHART_SIZE, chart_path)] = chart_path
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            try:
+                future.result()
+                manifest['charts'].append(os.path.relpath(path, output_dir))
+            except Exception as e:
+                manifest['errors'].append(f"{path}: {e}")
+            log(f"[{done}/{len(futures)}] {os.path.relpath(path, output_dir)}")
+
+    manifest['charts'].sort()
+    with open(os.path.join(output_dir, "report.json"), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Render the Spotify dashboards and summary tables without a display.")
+    parser.add_argument("catalog", help="songs catalog CSV")
+    parser.add_argument("histories", nargs="*", help="StreamingHistory exports (JSON file, directory or zip), one per user")
+    parser.add_argument("-o", "--output", default="report", help="output directory (default: report)")
+    parser.add_argument("-j", "--workers", type=int, default=MAX_WORKERS, help="rendering processes")
+    args = parser.parse_args(argv)
+
+    manifest = run_report(args.catalog, args.histories, args.output, workers=args.workers)
+    for error in manifest['errors']:
+        print(f"Error: {error}", file=sys.stderr)
+    return 1 if manifest['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
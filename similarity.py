@@ -0,0 +1,247 @@
+import numpy as np
+import pandas as pd
+from density import AUDIO_ATTRIBUTES
+from history_join import match_history
+from topk import top_k_positions
+
+
+TOP_K = 10
+# Seeds taken from a listening history: its most played matched songs
+HISTORY_SEEDS = 20
+# Catalog rows per matrix product and queries per batch. One block of squared
+# distances is QUERY_BLOCK x BLOCK_ROWS float32 (4 MiB), small enough to stay in cache
+BLOCK_ROWS = 16_384
+QUERY_BLOCK = 64
+
+
+class SimilarityIndex:
+    """
+    Summary: nearest-neighbour search over the audio attributes of a Catalog. Every
+    attribute is standardized to zero mean and unit variance, so tempo and loudness
+    do not outweigh the 0-1 attributes, and songs are compared by Euclidean distance
+    in that space. Squared distances from a batch of queries to a block of songs are
+    one float32 matrix product; only the k best per query are kept between blocks.
+    A song listed more than once (same artist and title) shares one song id: every
+    song is returned at most once per query, and never for a seed of its own.
+    """
+
+    def __init__(self, catalog, attributes=AUDIO_ATTRIBUTES):
+        df = catalog.df
+        features = df[attributes].to_numpy(dtype=np.float64)
+        self.catalog = catalog
+        self.attributes = list(attributes)
+        self.mean = features.mean(axis=0)
+        std = features.std(axis=0)
+        self.std = np.where(std > 0, std, 1.0)
+        self.features = np.ascontiguousarray((features - self.mean) / self.std, dtype=np.float32)
+        self.squared_norms = np.einsum('ij,ij->i', self.features, self.features)
+
+        keys = df['artist'].cat.codes.to_numpy().astype(np.int64) * (len(df['song'].cat.categories) + 1) \
+            + df['song'].cat.codes.to_numpy()
+        _, self.song_ids = np.unique(keys, return_inverse=True)
+        # Enough candidates per wanted song that k distinct songs survive dropping copies
+        self.max_copies = int(np.bincount(self.song_ids).max()) if len(df) else 1
+
+    def __len__(self):
+        return len(self.features)
+
+    def vectors(self, rows):
+        """
+        Summary: standardized feature vectors of the given rows
+        """
+        return self.features[np.asarray(rows, dtype=np.int64)]
+
+    def search(self, queries, k=TOP_K, query_songs=None, excluded_songs=None):
+        """
+        Summary: (rows, distances) of the k nearest songs to every standardized query
+        vector, both (queries, k) and nearest first, ties broken by row id.
+        query_songs holds the song id each query must not return (-1 for none),
+        excluded_songs is a boolean mask over song ids that no query returns.
+        When fewer than k songs are left, the tail is row -1 at distance inf.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = max(min(k, len(self)), 0)
+        rows = np.full((len(queries), k), -1, dtype=np.int64)
+        distances = np.full((len(queries), k), np.inf)
+        if k == 0:
+            return rows, distances
+        for start in range(0, len(queries), QUERY_BLOCK):
+            batch = slice(start, start + QUERY_BLOCK)
+            own = None if query_songs is None else np.asarray(query_songs)[batch]
+            rows[batch], distances[batch] = self._search_batch(queries[batch], k, own, excluded_songs)
+        return rows, distances
+
+    def _search_batch(self, queries, k, own_songs, excluded_songs):
+        wanted = k
+        k = min(k * self.max_copies, len(self))
+        n = len(queries)
+        best_rows = np.full((n, k), -1, dtype=np.int64)
+        best = np.full((n, k), np.inf, dtype=np.float32)
+        query_norms = np.einsum('ij,ij->i', queries, queries)
+        for start in range(0, len(self), BLOCK_ROWS):
+            end = min(start + BLOCK_ROWS, len(self))
+            # |q - x|^2 = |q|^2 + |x|^2 - 2 q.x, the product being the only O(n x block x attributes) step
+            block = queries @ self.features[start:end].T
+            block *= -2.0
+            block += query_norms[:, None]
+            block += self.squared_norms[None, start:end]
+
+            if start == 0:
+                # The first block seeds every query's k best with a partial sort
+                songs = self.song_ids[start:end]
+                if own_songs is not None:
+                    block[songs[None, :] == own_songs[:, None]] = np.inf
+                if excluded_songs is not None:
+                    block[:, excluded_songs[songs]] = np.inf
+                take = min(k, end - start)
+                positions = np.argpartition(block, take - 1, axis=1)[:, :take]
+                best[:, :take] = np.take_along_axis(block, positions, axis=1)
+                best_rows[:, :take] = positions
+                continue
+
+            # Later blocks: only songs nearer than a query's current k-th best can enter, usually a handful
+            query, column = np.nonzero(block < best.max(axis=1)[:, None])
+            rows = column + start
+            valid = np.ones(len(rows), dtype=bool)
+            if own_songs is not None:
+                valid &= self.song_ids[rows] != own_songs[query]
+            if excluded_songs is not None:
+                valid &= ~excluded_songs[self.song_ids[rows]]
+            if valid.any():
+                best, best_rows = _merge_best(best, best_rows, query[valid], rows[valid], block[query[valid], column[valid]])
+
+        # Exact distances of the winners only: the expanded form above loses precision for near-equal songs
+        found = np.isfinite(best)
+        best_rows = np.where(found, best_rows, -1)
+        difference = self.features[np.maximum(best_rows, 0)] - queries[:, None, :]
+        distances = np.where(found, np.sqrt(np.einsum('ijk,ijk->ij', difference, difference, dtype=np.float64)), np.inf)
+        order = np.lexsort((np.where(found, best_rows, len(self)), distances), axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        distances = np.take_along_axis(distances, order, axis=1)
+
+        # Keep the nearest copy of every song: a candidate is first of its song when no nearer one shares its id
+        songs = np.where(found, self.song_ids[np.maximum(best_rows, 0)], -1)
+        by_song = np.argsort(songs, axis=1, kind='stable')
+        sorted_songs = np.take_along_axis(songs, by_song, axis=1)
+        first = np.ones_like(sorted_songs, dtype=bool)
+        first[:, 1:] = sorted_songs[:, 1:] != sorted_songs[:, :-1]
+        unique = np.empty_like(first)
+        np.put_along_axis(unique, by_song, first, axis=1)
+        unique &= best_rows >= 0
+        slot = np.cumsum(unique, axis=1) - 1
+        keep = unique & (slot < wanted)
+        query, _ = np.nonzero(keep)
+        rows = np.full((n, wanted), -1, dtype=np.int64)
+        result = np.full((n, wanted), np.inf)
+        rows[query, slot[keep]] = best_rows[keep]
+        result[query, slot[keep]] = distances[keep]
+        return rows, result
+
+    def similar_to_rows(self, rows, k=TOP_K):
+        """
+        Summary: (rows, distances) of the k songs closest to each seed row, one batch for all seeds
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        return self.search(self.features[rows], k, query_songs=self.song_ids[rows])
+
+    def similar_to_mix(self, rows, weights=None, k=TOP_K):
+        """
+        Summary: (rows, distances) of the k songs closest to the weighted mean of the
+        seed rows, none of the seeds' own songs included
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        center = np.average(self.features[rows].astype(np.float64), axis=0, weights=weights)
+        excluded = np.zeros(self.song_ids.max() + 1 if len(self) else 0, dtype=bool)
+        excluded[self.song_ids[rows]] = True
+        found, distances = self.search(center[None, :], k, excluded_songs=excluded)
+        return found[0], distances[0]
+
+
+def _merge_best(best, best_rows, query, rows, values):
+    """
+    Summary: adds (query, row, squared distance) candidates to the (queries, k) best
+    arrays and keeps the k smallest per query
+    """
+    n, k = best.shape
+    all_queries = np.concatenate([np.repeat(np.arange(n), k), query])
+    all_values = np.concatenate([best.ravel(), values])
+    all_rows = np.concatenate([best_rows.ravel(), rows])
+    order = np.lexsort((all_values, all_queries))
+    all_queries = all_queries[order]
+    rank = np.arange(len(order)) - np.searchsorted(all_queries, all_queries)
+    keep = order[rank < k]
+    return all_values[keep].reshape(n, k), all_rows[keep].reshape(n, k)
+
+
+def recommendation_frame(catalog, rows, distances, seed_rows=None):
+    """
+    Summary: one table row per recommendation: seed song (when given), rank, artist,
+    song, year, genre and distance. rows/distances are search results, -1 rows dropped.
+    """
+    rows = np.atleast_2d(rows)
+    distances = np.atleast_2d(distances)
+    ranks = np.broadcast_to(np.arange(1, rows.shape[1] + 1), rows.shape)
+    found = rows >= 0
+    df = catalog.df
+    picked = rows[found]
+    frame = {}
+    if seed_rows is not None:
+        seeds = np.broadcast_to(np.asarray(seed_rows, dtype=np.int64)[:, None], rows.shape)[found]
+        frame['seed_artist'] = df['artist'].to_numpy()[seeds]
+        frame['seed_song'] = df['song'].to_numpy()[seeds]
+    frame.update({
+        'rank': ranks[found],
+        'artist': df['artist'].to_numpy()[picked],
+        'song': df['song'].to_numpy()[picked],
+        'year': df['year'].to_numpy()[picked],
+        'genre': df['genre'].to_numpy()[picked],
+        'distance': distances[found],
+        'row': picked,
+    })
+    return pd.DataFrame(frame)
+
+
+def similar_songs(catalog, rows, k=TOP_K):
+    """
+    Summary: the k songs most like each of the given catalog rows, as a recommendation_frame
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    found, distances = catalog.similarity_index.similar_to_rows(rows, k)
+    return recommendation_frame(catalog, found, distances, seed_rows=rows)
+
+
+def history_seeds(match, n=HISTORY_SEEDS):
+    """
+    Summary: (catalog rows, ms played) of the most played matched songs of a HistoryMatch
+    """
+    row_ms = match.row_ms()
+    rows = top_k_positions(row_ms, n)
+    rows = rows[row_ms[rows] > 0]
+    return rows, row_ms[rows]
+
+
+def recommend_for_match(match, k=TOP_K, seeds=HISTORY_SEEDS):
+    """
+    Summary: songs for a listener whose history is already joined to the catalog (a
+    HistoryMatch): takes its most played songs as seeds and returns (the k songs closest
+    to the seeds' mix weighted by time played, the k songs closest to every seed). Both
+    are recommendation_frames, empty when no play matched the catalog.
+    """
+    catalog = match.catalog
+    rows, ms = history_seeds(match, seeds)
+    index = catalog.similarity_index
+    if len(rows) == 0:
+        found, distances = np.empty((0, k), dtype=np.int64), np.empty((0, k))
+        return (recommendation_frame(catalog, found, distances),
+                recommendation_frame(catalog, found, distances, seed_rows=rows))
+    mix_rows, mix_distances = index.similar_to_mix(rows, weights=ms, k=k)
+    seed_found, seed_distances = index.similar_to_rows(rows, k)
+    return (recommendation_frame(catalog, mix_rows, mix_distances),
+            recommendation_frame(catalog, seed_found, seed_distances, seed_rows=rows))
+
+
+def recommend_for_history(history, catalog, k=TOP_K, seeds=HISTORY_SEEDS):
+    """
+    Summary: recommend_for_match after joining the history to the catalog, misspelled names included
+    """
+    return recommend_for_match(match_history(history, catalog, fuzzy=True), k, seeds)
@@ -0,0 +1,125 @@
+import tkinter as tk
+from tkinter import ttk
+import numpy as np
+
+
+class TableColumn:
+    """
+    Summary: one column of a VirtualTable. values is a numpy array with one entry
+    per row, fmt turns a single value into the cell text. Sortable columns can be
+    reordered by clicking their heading, descending_first columns sort high to low
+    on the first click.
+    """
+
+    def __init__(self, heading, values, fmt=str, width=120, sortable=False, descending_first=False, anchor="w"):
+        self.heading = heading
+        self.values = np.asarray(values)
+        self.fmt = fmt
+        self.width = width
+        self.sortable = sortable
+        self.descending_first = descending_first
+        self.anchor = anchor
+
+
+class VirtualTable(tk.Frame):
+    """
+    Summary: scrollable table that only ever holds `height` Treeview items.
+    Scrolling moves a window over a row order array and rewrites the visible
+    items, so building and scrolling cost the same at 100 or 1,000,000 rows.
+    Sorting permutes the order array in place, no widgets are rebuilt.
+    """
+
+    def __init__(self, parent, columns, height=15, **kwargs):
+        super().__init__(parent, bg="black", **kwargs)
+        self.columns = columns
+        self.height = height
+        self.n_rows = len(columns[0].values) if columns else 0
+        self.order = np.arange(self.n_rows)
+        self.offset = 0
+        self._sort_column = None
+        self._descending = False
+        self._selected = None
+
+        style = ttk.Style(self)
+        style.configure("Spotify.Treeview", background="black", fieldbackground="black", foreground="white",
+                        font=("Helvetica", 12), rowheight=24)
+        style.configure("Spotify.Treeview.Heading", font=("Helvetica", 14, "bold"))
+
+        ids = [f"c{i}" for i in range(len(columns))]
+        self.tree = ttk.Treeview(self, columns=ids, show="headings", height=height,
+                                 selectmode="browse", style="Spotify.Treeview")
+        for column_id, column in zip(ids, columns):
+            command = (lambda c=column: self.sort_by(c)) if column.sortable else ""
+            self.tree.heading(column_id, text=column.heading, command=command)
+            self.tree.column(column_id, width=column.width, anchor=column.anchor)
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self._items = [self.tree.insert("", "end", values=()) for _ in range(min(height, self.n_rows))]
+
+        for widget in (self.tree, self.scrollbar):
+            widget.bind("<MouseWheel>", self._on_mousewheel)
+            widget.bind("<Button-4>", lambda event: self.scroll_to(self.offset - 3))
+            widget.bind("<Button-5>", lambda event: self.scroll_to(self.offset + 3))
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<Up>", lambda event: self.scroll_to(self.offset - 1))
+        self.tree.bind("<Down>", lambda event: self.scroll_to(self.offset + 1))
+        self.tree.bind("<Prior>", lambda event: self.scroll_to(self.offset - self.height))
+        self.tree.bind("<Next>", lambda event: self.scroll_to(self.offset + self.height))
+
+        self._refresh()
+
+    def _max_offset(self):
+        return max(self.n_rows - self.height, 0)
+
+    def scroll_to(self, offset):
+        offset = min(max(int(offset), 0), self._max_offset())
+        if offset != self.offset:
+            self.offset = offset
+            self._refresh()
+        return "break"
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * self.n_rows)
+        elif action == "scroll":
+            step = self.height if unit == "pages" else 1
+            self.scroll_to(self.offset + int(amount) * step)
+
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS a few units, so small deltas count as one notch
+        notches = int(event.delta / 120) if abs(event.delta) >= 120 else int(np.sign(event.delta))
+        return self.scroll_to(self.offset - notches * 3)
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self._items:
+            self._selected = int(self.order[self.offset + self._items.index(selection[0])])
+
+    def _refresh(self):
+        rows = self.order[self.offset:self.offset + len(self._items)]
+        selected_item = ()
+        for item, row in zip(self._items, rows):
+            self.tree.item(item, values=[column.fmt(column.values[row]) for column in self.columns])
+            if row == self._selected:
+                selected_item = (item,)
+        # Items are reused for other rows while scrolling, so the selection follows the row
+        self.tree.selection_set(selected_item)
+        if self.n_rows:
+            self.scrollbar.set(self.offset / self.n_rows, (self.offset + len(self._items)) / self.n_rows)
+
+    def sort_by(self, column):
+        """
+        Summary: sorts by column, clicking the same heading again flips the direction
+        """
+        if self._sort_column is column:
+            self._descending = not self._descending
+        else:
+            self._sort_column = column
+            self._descending = column.descending_first
+        order = np.argsort(column.values, kind='stable')
+        self.order = order[::-1] if self._descending else order
+        self.offset = 0
+        self._refresh()
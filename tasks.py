@@ -0,0 +1,135 @@
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox, ttk
+from instrumentation import span
+
+
+POLL_MS = 50
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="spotify-task")
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class Task:
+    """
+    Summary: handle passed to every background function. The function calls
+    report() to publish progress and check_cancelled() between steps so the
+    Cancel button can stop it.
+    """
+
+    def __init__(self):
+        self.future = None
+        self._cancel_event = threading.Event()
+        self._progress = queue.Queue()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+
+    def report(self, message, fraction=None):
+        """
+        Summary: fraction is the share of the work done (0-1), None when unknown
+        """
+        self._progress.put((message, fraction))
+
+    def drain_progress(self):
+        updates = []
+        while True:
+            try:
+                updates.append(self._progress.get_nowait())
+            except queue.Empty:
+                return updates
+
+
+class ProgressDialog:
+    """
+    Summary: small window with a progress bar and a Cancel button for a Task
+    """
+
+    def __init__(self, title, task):
+        self.window = tk.Toplevel()
+        self.window.title(title)
+        self.window.geometry("400x160")
+        self.window.configure(bg="black")
+        self.window.protocol("WM_DELETE_WINDOW", task.cancel)
+
+        self.label = tk.Label(self.window, text=title, font=("Helvetica", 12), fg="white", bg="black")
+        self.label.pack(pady=15)
+
+        self.bar = ttk.Progressbar(self.window, length=320, mode='indeterminate')
+        self.bar.pack(pady=5)
+        self.bar.start(15)
+
+        tk.Button(self.window, text="Cancel", command=task.cancel, bg="#1DB954", fg="black",
+                  font=("Helvetica", 12)).pack(pady=10)
+
+    def update_progress(self, message, fraction):
+        self.label.configure(text=message)
+        if fraction is not None:
+            if str(self.bar.cget('mode')) != 'determinate':
+                self.bar.stop()
+                self.bar.configure(mode='determinate', maximum=1.0)
+            self.bar.configure(value=fraction)
+
+    def close(self):
+        if self.window.winfo_exists():
+            self.window.destroy()
+
+
+def show_task_error(error):
+    messagebox.showerror("Error", str(error))
+
+
+def _run_task(func, task, *args):
+    # Every background task is the root span of its worker thread in the session trace
+    with span(f"task.{getattr(func, '__name__', 'task')}"):
+        return func(task, *args)
+
+
+def run_in_background(func, *args, on_done=None, on_error=show_task_error, title=None, widget=None):
+    """
+    Summary: runs func(task, *args) on a worker thread and keeps the Tk main loop free.
+    A root.after poll forwards progress to the optional progress dialog and calls
+    on_done(result) or on_error(exception) back on the Tk thread. Nothing is called
+    when the task was cancelled. Tk widgets must only be touched in the callbacks.
+    """
+    root = widget.nametowidget('.') if widget is not None else tk._default_root
+    task = Task()
+    task.future = _executor.submit(_run_task, func, task, *args)
+    dialog = ProgressDialog(title, task) if title else None
+
+    def poll():
+        updates = task.drain_progress()
+        if dialog is not None and updates:
+            dialog.update_progress(*updates[-1])
+        if not task.future.done():
+            root.after(POLL_MS, poll)
+            return
+
+        if dialog is not None:
+            dialog.close()
+        if task.future.cancelled() or task.cancelled:
+            return
+        error = task.future.exception()
+        if error is None:
+            if on_done is not None:
+                on_done(task.future.result())
+        elif not isinstance(error, TaskCancelled) and on_error is not None:
+            on_error(error)
+
+    root.after(POLL_MS, poll)
+    return task
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+
+MINUTES_PER_DAY = 24 * 60
+MS_PER_MINUTE = 60 * 1000
+# 1970-01-01 was a Thursday, so day 0 is weekday 3 (Monday = 0)
+EPOCH_WEEKDAY = 3
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+# A pause longer than this between two plays starts a new listening session
+SESSION_GAP_MINUTES = 30
+# Plays shorter than this count as skipped
+SKIP_MS = 30_000
+
+
+class ListeningTimeline:
+    """
+    Summary: time-based views over a StreamingHistory. endTime is turned into int64
+    epoch minutes once and the plays are put in time order once; every view
+    afterwards is a bincount or cumsum over those arrays, with no per-play Python.
+    """
+
+    def __init__(self, history, session_gap_minutes=SESSION_GAP_MINUTES, skip_ms=SKIP_MS):
+        minutes = history.end_time.astype('datetime64[m]').astype(np.int64)
+        order = None
+        if len(minutes) > 1 and (np.diff(minutes) < 0).any():
+            order = np.argsort(minutes, kind='stable')
+            minutes = minutes[order]
+
+        def ordered(values):
+            return values if order is None else values[order]
+
+        self.history = history
+        self.end_minutes = minutes
+        self.ms_played = ordered(history.ms_played).astype(np.int64, copy=False)
+        self.artist_codes = ordered(history.artist_codes)
+        self.track_codes = ordered(history.track_codes)
+        self.session_gap_minutes = session_gap_minutes
+        self.skip_ms = skip_ms
+        self.skipped = self.ms_played < skip_ms
+
+    def __len__(self):
+        return len(self.end_minutes)
+
+    def _totals(self, codes, size):
+        ms = np.bincount(codes, weights=self.ms_played, minlength=size).astype(np.int64)
+        plays = np.bincount(codes, minlength=size)
+        skips = np.bincount(codes, weights=self.skipped, minlength=size).astype(np.int64)
+        return ms, plays, skips
+
+    def hour_of_week(self):
+        """
+        Summary: (ms played, plays) as 7 x 24 arrays indexed [weekday, hour], Monday first
+        """
+        days = self.end_minutes // MINUTES_PER_DAY
+        weekday = (days + EPOCH_WEEKDAY) % 7
+        hour = (self.end_minutes % MINUTES_PER_DAY) // 60
+        ms, plays, _ = self._totals(weekday * 24 + hour, 7 * 24)
+        return ms.reshape(7, 24), plays.reshape(7, 24)
+
+    def _period_totals(self, codes, first, index_name, to_dates):
+        if len(codes) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return pd.DataFrame({'msPlayed': empty, 'plays': empty, 'skips': empty},
+                                index=pd.DatetimeIndex([], name=index_name))
+        ms, plays, skips = self._totals(codes - first, int(codes[-1] - first) + 1)
+        index = pd.DatetimeIndex(to_dates(first + np.arange(len(ms))), name=index_name)
+        return pd.DataFrame({'msPlayed': ms, 'plays': plays, 'skips': skips}, index=index)
+
+    def daily_totals(self):
+        """
+        Summary: msPlayed, plays and skips per calendar day, days without plays included
+        """
+        days = self.end_minutes // MINUTES_PER_DAY
+        return self._period_totals(days, days[0] if len(days) else 0, 'day',
+                                   lambda codes: codes.astype('datetime64[D]'))
+
+    def weekly_totals(self):
+        """
+        Summary: msPlayed, plays and skips per week, indexed by the Monday starting it
+        """
+        weeks = (self.end_minutes // MINUTES_PER_DAY + EPOCH_WEEKDAY) // 7
+        return self._period_totals(weeks, weeks[0] if len(weeks) else 0, 'week',
+                                   lambda codes: (codes * 7 - EPOCH_WEEKDAY).astype('datetime64[D]'))
+
+    def start_minutes(self):
+        """
+        Summary: estimated start of every play, its end minus the time played
+        """
+        return self.end_minutes - self.ms_played // MS_PER_MINUTE
+
+    def session_ids(self):
+        """
+        Summary: session number of every play (in time order). A play starts a new
+        session when it began more than session_gap_minutes after the previous one ended.
+        """
+        if len(self) == 0:
+            return np.empty(0, dtype=np.int64)
+        gaps = self.start_minutes()[1:] - self.end_minutes[:-1]
+        return np.concatenate([[0], np.cumsum(gaps > self.session_gap_minutes)])
+
+    def sessions(self):
+        """
+        Summary: one row per listening session: start, end, plays, msPlayed, skips and distinct artists
+        """
+        ids = self.session_ids()
+        if len(ids) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return pd.DataFrame({'start': pd.DatetimeIndex([]), 'end': pd.DatetimeIndex([]), 'plays': empty,
+                                 'msPlayed': empty, 'skips': empty, 'artists': empty},
+                                index=pd.RangeIndex(0, name='session'))
+        n = int(ids[-1]) + 1
+        ms, plays, skips = self._totals(ids, n)
+        # Sessions are contiguous runs of plays, so a session's first play is at the cumulative play count
+        first = np.concatenate([[0], np.cumsum(plays)[:-1]])
+        last = first + plays - 1
+        width = int(self.artist_codes.max()) + 1
+        pairs = np.unique(ids * width + self.artist_codes)
+        artists = np.bincount(pairs // width, minlength=n)
+        return pd.DataFrame({
+            'start': self.start_minutes()[first].astype('datetime64[m]'),
+            'end': self.end_minutes[last].astype('datetime64[m]'),
+            'plays': plays,
+            'msPlayed': ms,
+            'skips': skips,
+            'artists': artists,
+        }, index=pd.RangeIndex(n, name='session'))
+
+    def skip_rates(self, by='artist'):
+        """
+        Summary: plays, skips and skip rate per artist name (by="artist") or per
+        (artist, track) pair (by="track"), so songs that share a title across artists are kept apart
+        """
+        if by == 'artist':
+            names = self.history.artist_names
+            _, plays, skips = self._totals(self.artist_codes, len(names))
+            played = plays > 0
+            index = pd.Index(names[played], name='artistName')
+        else:
+            n_tracks = len(self.history.track_names)
+            pairs, codes = np.unique(self.artist_codes.astype(np.int64) * n_tracks + self.track_codes,
+                                     return_inverse=True)
+            _, plays, skips = self._totals(codes, len(pairs))
+            played = plays > 0
+            index = pd.MultiIndex.from_arrays(
+                [self.history.artist_names[pairs // n_tracks], self.history.track_names[pairs % n_tracks]],
+                names=['artistName', 'trackName'])
+        return pd.DataFrame({'plays': plays[played], 'skips': skips[played],
+                             'skipRate': skips[played] / plays[played]}, index=index)
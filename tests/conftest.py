@@ -0,0 +1,57 @@
+import itertools
+import json
+import os
+import sys
+import pytest
+
+# The modules live at the repository root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog_cache import load_catalog  # noqa: E402
+from history_loader import load_history  # noqa: E402
+
+CATALOG = """artist,song,duration_ms,explicit,year,popularity,danceability,energy,key,loudness,mode,speechiness,acousticness,instrumentalness,liveness,valence,tempo,genre
+Britney Spears,Oops!...I Did It Again,211160,False,2000,77,0.751,0.834,1,-5.444,0,0.0437,0.3,1.77e-05,0.355,0.894,95.053,pop
+blink-182,All The Small Things,167066,False,1999,79,0.434,0.897,0,-4.918,1,0.0488,0.0103,0.0,0.612,0.684,148.726,"rock, pop"
+Faith Hill,Breathe,250546,False,1999,66,0.529,0.496,7,-9.007,1,0.029,0.173,0.0,0.251,0.278,136.859,"pop, country"
+Bon Jovi,It's My Life,224493,False,2000,78,0.551,0.913,0,-4.063,0,0.0466,0.0263,1.35e-05,0.347,0.544,119.992,"rock, metal"
+"""
+
+
+@pytest.fixture
+def catalog_csv(tmp_path):
+    path = tmp_path / "songs.csv"
+    path.write_text(CATALOG, encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def catalog(catalog_csv):
+    return load_catalog(catalog_csv)
+
+
+@pytest.fixture
+def write_export(tmp_path):
+    """
+    Summary: writes play records as a StreamingHistory JSON export and returns its path.
+    endTime and msPlayed default to 2024-01-01 10:00 and one minute.
+    """
+    names = (f"history_{i}.json" for i in itertools.count())
+
+    def write(records, name=None):
+        path = tmp_path / (name or next(names))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump([{'endTime': "2024-01-01 10:00", 'msPlayed': 60000, **record} for record in records], file)
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def make_history(write_export):
+    """
+    Summary: loads play records through write_export and load_history
+    """
+    def make(records, name=None):
+        return load_history(write_export(records, name))
+    return make
@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+from aggregation import PlayAggregates
+from temporal import ListeningTimeline
+
+
+def test_empty_history_tables_keep_integer_columns(make_history):
+    empty = make_history([])
+    full = make_history([{'artistName': "A", 'trackName': "T"}])
+
+    tables = [PlayAggregates(empty).daily_totals(), PlayAggregates(empty).monthly_totals(),
+              ListeningTimeline(empty).daily_totals(), ListeningTimeline(empty).weekly_totals(),
+              ListeningTimeline(empty).sessions()]
+    for table in tables:
+        for column in ('msPlayed', 'plays', 'skips', 'artists'):
+            if column in table:
+                assert table[column].dtype == np.int64
+
+    merged = pd.concat([PlayAggregates(empty).daily_totals(), PlayAggregates(full).daily_totals()])
+    assert merged['msPlayed'].dtype == np.int64 and merged['plays'].dtype == np.int64
@@ -0,0 +1,36 @@
+import os
+import numpy as np
+from batch_analysis import analyze_chunk, load_plan, load_table, merge_parts
+
+
+def test_merge_keeps_parts_of_users_without_plays(tmp_path, write_export):
+    alice = write_export([{'artistName': "A", 'trackName': "T"}, {'artistName': "B", 'trackName': "U"}], "ex/alice.json")
+    empty = write_export([], "ex/empty.json")
+    broken = tmp_path / "ex" / "broken.json"
+    broken.write_text("{}", encoding='utf-8')
+    output_dir = str(tmp_path / "out")
+
+    analyze_chunk(0, [["alice", alice]], output_dir)
+    # The only user analyzed in this chunk has zero plays, so its artist and track tables have no rows
+    _, analyzed, errors = analyze_chunk(1, [["broken", str(broken)], ["empty", empty]], output_dir)
+    assert analyzed == 1 and len(errors) == 1
+
+    errors = merge_parts(output_dir)
+    assert len(errors) == 1
+    users = load_table(os.path.join(output_dir, "results", "users"))
+    assert list(users['user']) == ["alice", "empty"]
+    assert list(users['plays']) == [2, 0]
+    top_artists = load_table(os.path.join(output_dir, "results", "top_artists"))
+    assert list(top_artists['artist']) == ["A", "B"]
+    assert top_artists['ms_played'].dtype == np.int64
+
+
+def test_plan_stores_absolute_export_paths(tmp_path, write_export, monkeypatch):
+    write_export([], "ex/alice.json")
+    (tmp_path / "out").mkdir()
+    monkeypatch.chdir(tmp_path)
+    plan = load_plan("ex", str(tmp_path / "out"))
+    [[[user, path]]] = plan['chunks']
+
+    assert user == "alice"
+    assert path == str(tmp_path / "ex" / "alice.json")
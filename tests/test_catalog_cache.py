@@ -0,0 +1,45 @@
+import io
+import os
+import numpy as np
+import pandas as pd
+from catalog_cache import CACHE_DIR, _cache_path, load_catalog, open_cache
+from conftest import CATALOG
+
+
+def test_catalog_round_trips_through_the_cache(catalog_csv):
+    built = load_catalog(catalog_csv)
+    expected = pd.read_csv(catalog_csv)
+
+    assert len(built) == 4
+    assert list(built.df['artist']) == list(expected['artist'])
+    assert built.df['year'].dtype == np.int16
+    assert np.allclose(built.df['energy'], expected['energy'])
+    assert sorted(built.genre_names) == ["country", "metal", "pop", "rock"]
+    # One (row, genre) pair per genre of a song, grouped by song
+    assert list(built.genre_rows) == [0, 1, 1, 2, 2, 3, 3]
+
+
+def test_unchanged_csv_returns_the_same_catalog(catalog_csv):
+    first = load_catalog(catalog_csv)
+    matcher = first.matcher
+
+    again = load_catalog(catalog_csv)
+    assert again is first and again.matcher is matcher
+
+    with open(catalog_csv, 'a', encoding='utf-8') as file:
+        file.write(CATALOG.splitlines()[1] + "\n")
+    changed = load_catalog(catalog_csv)
+    assert changed is not first and len(changed) == 5
+
+
+def test_extra_text_columns_are_memory_mapped(tmp_path):
+    csv_path = tmp_path / "songs.csv"
+    df = pd.read_csv(io.StringIO(CATALOG))
+    df['note'] = ["a", "b", "a", "c"]
+    df.to_csv(csv_path, index=False)
+    load_catalog(str(csv_path))
+
+    # Chart workers open the cache straight from disk
+    cache_path = _cache_path(str(csv_path), CACHE_DIR)
+    assert os.path.exists(os.path.join(cache_path, "note.names.json"))
+    assert list(open_cache(cache_path).df['note']) == ["a", "b", "a", "c"]
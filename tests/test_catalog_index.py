@@ -0,0 +1,27 @@
+import pytest
+from catalog_index import parse_period
+
+
+def test_parse_period():
+    assert parse_period("2015") == (2015, 2016)
+    assert parse_period(" 2010s ") == (2010, 2020)
+    assert parse_period("2005-2012") == (2005, 2013)
+    for text in ("2012-2005", "soon", "20s0"):
+        with pytest.raises(ValueError):
+            parse_period(text)
+
+
+def test_name_lookups_ignore_case(catalog):
+    index = catalog.index
+    assert list(index.artist_rows("BON JOVI")) == [3]
+    assert list(index.search_artist_rows("hill")) == [2]
+    assert list(index.search_song_rows("breathe")) == [2]
+    assert list(index.search_song_rows("small")) == [1]
+    assert len(index.artist_rows("Nobody")) == 0
+
+
+def test_row_genre_pairs(catalog):
+    rows, codes = catalog.index.row_genre_pairs([1, 3])
+    assert list(rows) == [1, 1, 3, 3]
+    assert sorted(catalog.genre_names[codes[:2]]) == ["pop", "rock"]
+    assert sorted(catalog.genre_names[codes[2:]]) == ["metal", "rock"]
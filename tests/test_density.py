@@ -0,0 +1,36 @@
+import threading
+import numpy as np
+from density import PairHistograms
+
+
+def test_concurrent_saves_leave_one_complete_file(catalog, tmp_path):
+    histograms = PairHistograms.build(catalog.df)
+    out_dir = tmp_path / "histograms"
+    out_dir.mkdir()
+    path = str(out_dir / "pair_histograms.npz")
+    errors = []
+
+    def save():
+        try:
+            for _ in range(20):
+                histograms.save(path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert [p.name for p in out_dir.iterdir()] == ["pair_histograms.npz"]
+    x_edges, y_edges, counts = PairHistograms.load(path).get('energy', 'danceability')
+    assert np.array_equal(counts, histograms.get('energy', 'danceability')[2])
+    assert counts.sum() == len(catalog)
+
+
+def test_for_catalog_reuses_the_saved_histograms(catalog):
+    built = PairHistograms.for_catalog(catalog)
+    loaded = PairHistograms.for_catalog(catalog)
+    assert np.array_equal(built.get('tempo', 'energy')[2], loaded.get('tempo', 'energy')[2])
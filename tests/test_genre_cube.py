@@ -0,0 +1,14 @@
+def test_period_counts_match_a_scan(catalog):
+    cube = catalog.genre_cube
+
+    assert cube.period_counts("1999").to_dict() == {"country": 1, "pop": 2, "rock": 1}
+    assert cube.period_counts("1990s").to_dict() == cube.period_counts("1999").to_dict()
+    assert cube.period_counts("1999-2000").to_dict() == {"country": 1, "metal": 1, "pop": 3, "rock": 2}
+    assert cube.period_counts("2015").empty
+    assert cube.songs(1999, 2001) == 4 and cube.songs(2001, 2005) == 0
+
+
+def test_trend_shares(catalog):
+    trend = catalog.genre_cube.trend(["pop", "rock"], share=True)
+    assert list(trend.index) == [1999, 2000]
+    assert trend.loc[1999, "pop"] == 1.0 and trend.loc[2000, "rock"] == 0.5
@@ -0,0 +1,39 @@
+import numpy as np
+from history_join import TrigramBlocker, match_history, normalize_names
+
+PLAYS = [
+    {'artistName': "BRITNEY SPEARS", 'trackName': "Oops!...I Did It Again - Remastered", 'msPlayed': 120000},
+    {'artistName': "Blink 182", 'trackName': "All the Small Things", 'msPlayed': 60000},  # misspelled artist
+    {'artistName': "Faith Hill", 'trackName': "Breathe (feat. Nobody)", 'msPlayed': 60000},
+    {'artistName': "Unknown Band", 'trackName': "Unknown Song", 'msPlayed': 60000},
+]
+
+
+def test_normalize_names():
+    assert list(normalize_names(["Beyoncé & JAY-Z"])) == ["beyonce and jayz"]
+    assert list(normalize_names(["Breathe (feat. Someone) - 2004 Remaster"], track=True)) == ["breathe"]
+
+
+def test_exact_and_fuzzy_matches(catalog, make_history):
+    history = make_history(PLAYS)
+
+    exact = match_history(history, catalog)
+    fuzzy = match_history(history, catalog, fuzzy=True)
+
+    assert list(exact.catalog_rows) == [0, -1, 2, -1]
+    assert list(fuzzy.catalog_rows) == [0, 1, 2, -1]
+    assert fuzzy.coverage() == {'plays': 4, 'matched_plays': 3, 'play_share': 0.75, 'ms_share': 0.8}
+    assert fuzzy.row_ms()[[0, 1, 2, 3]].tolist() == [120000, 60000, 60000, 0]
+
+
+def test_genre_profile_weights_by_time_played(catalog, make_history):
+    profile = match_history(make_history(PLAYS), catalog, fuzzy=True).genre_profile()
+    # pop is on all three matched songs, rock only on blink-182
+    assert profile['pop'] == 1.0
+    assert profile['rock'] == 0.25
+    assert np.isclose(profile['country'], 0.25)
+
+
+def test_trigram_blocker_ranks_by_shared_trigrams():
+    blocker = TrigramBlocker(["blink182", "britney spears", "faith hill", "bon jovi"])
+    assert blocker.candidates("blink 182", limit=1) == ["blink182"]
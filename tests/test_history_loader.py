@@ -0,0 +1,17 @@
+import io
+import json
+import pytest
+from history_loader import iter_json_array
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1 << 20])
+def test_elements_split_across_chunks(chunk_size):
+    values = [12345, -0.5e10, True, None, "a, b]", {'msPlayed': 123456, 'trackName': "x"}, [1, [2]]]
+    text = json.dumps(values)
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == values
+    assert list(iter_json_array(io.StringIO(f" \n{text} \n"), chunk_size)) == values
+
+
+def test_unterminated_array_raises():
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(io.StringIO("[1, 2"), 2))
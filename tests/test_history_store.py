@@ -0,0 +1,26 @@
+import threading
+from history_store import HistoryStore
+
+
+def minute_records(start):
+    return [{'endTime': f"2024-01-01 10:{minute:02d}", 'artistName': f"Artist {minute % 3}",
+             'trackName': f"Track {minute}"} for minute in range(start, start + 10)]
+
+
+def test_concurrent_imports_keep_every_play(tmp_path, make_history):
+    histories = [make_history(minute_records(i * 10)) for i in range(4)]
+    store_path = str(tmp_path / "store")
+    # One store per thread, opened before any import, as separate windows of the app do
+    stores = [HistoryStore(store_path) for _ in histories]
+    threads = [threading.Thread(target=store.import_history, args=(history,))
+               for store, history in zip(stores, histories)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    store = HistoryStore(store_path)
+    assert len(store) == 40
+    assert len({segment['id'] for segment in store.manifest['segments']}) == 4
+    assert store.artist_totals()['plays'].sum() == 40
+    assert stores[0].import_history(histories[1]) == 0
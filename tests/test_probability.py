@@ -0,0 +1,26 @@
+import numpy as np
+from probability import quantile_bins
+
+
+def test_equal_values_share_a_bin():
+    values = np.array([0.0] * 6 + [0.1, 0.2, 0.3, 0.4, 0.5, 0.6])
+    bins, level_bins, ranges = quantile_bins(values, 4)
+
+    assert len(set(bins[values == 0])) == 1
+    # Every bin is a value range: no value of a lower bin exceeds one of a higher bin
+    for b in range(bins.max()):
+        assert values[bins == b].max() < values[bins == b + 1].min()
+    assert list(level_bins) == [0, 0, 1, 2]
+    assert list(ranges[0]) == [0.0, 0.0]
+
+
+def test_tied_levels_give_the_same_probability(catalog):
+    tables = catalog.probability_tables
+    # Two of the four test songs have instrumentalness 0, so low and medium-low coincide
+    artist = catalog.index.artist_codes("blink-182")
+
+    assert tables.level_label('instrumentalness', 0) == "low to medium-low"
+    low = tables.artist_given_bin('instrumentalness', 0, [artist])
+    medium_low = tables.artist_given_bin('instrumentalness', 1, [artist])
+    assert (int(low[0][0]), int(low[1])) == (int(medium_low[0][0]), int(medium_low[1])) == (1, 2)
+    assert [names for _, names in tables.levels('energy')] == [['low'], ['medium-low'], ['medium-high'], ['high']]
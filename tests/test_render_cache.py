@@ -0,0 +1,35 @@
+import os
+from PIL import Image
+from render_cache import RenderCache
+
+
+def test_get_survives_eviction_after_reading(tmp_path, monkeypatch):
+    cache = RenderCache(str(tmp_path), max_memory_items=0)
+    key = cache.key("fingerprint", "chart")
+    cache.put(key, Image.new('RGBA', (4, 3)))
+
+    real_open = Image.open
+
+    def open_then_evict(path):
+        png = real_open(path)
+        png.load()
+        os.remove(path)  # another thread's _evict_disk runs right after the read
+        return png
+    monkeypatch.setattr(Image, "open", open_then_evict)
+
+    image = cache.get(key)
+    assert image is not None and image.size == (4, 3)
+    assert cache.get(key) is None
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = RenderCache(str(tmp_path), max_memory_items=0)
+    first, second = cache.key("f", "a"), cache.key("f", "b")
+    cache.put(first, Image.new('RGBA', (4, 3)))
+    first_path = os.path.join(str(tmp_path), f"{first}.png")
+    os.utime(first_path, (0, 0))
+    cache.max_disk_bytes = os.path.getsize(first_path)
+
+    cache.put(second, Image.new('RGBA', (4, 3)))
+    assert cache.get(first) is None
+    assert cache.get(second) is not None
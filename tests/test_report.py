@@ -0,0 +1,44 @@
+import json
+import os
+import pandas as pd
+from report import run_report, write_catalog_tables, write_user_report
+
+PLAYS = [
+    {'endTime': "2024-01-01 10:00", 'artistName': "Faith Hill", 'trackName': "Breathe"},
+    {'endTime': "2024-01-02 21:30", 'artistName': "Bon Jovi", 'trackName': "It's My Life", 'msPlayed': 5000},
+]
+
+
+def test_catalog_tables(catalog, tmp_path):
+    names = write_catalog_tables(catalog, str(tmp_path))
+
+    assert all(os.path.exists(tmp_path / name) for name in names)
+    top_songs = pd.read_csv(tmp_path / "top_songs_by_year.csv")
+    assert top_songs[['year', 'rank', 'song']].values.tolist() == [
+        [1999, 1, "All The Small Things"], [1999, 2, "Breathe"],
+        [2000, 1, "It's My Life"], [2000, 2, "Oops!...I Did It Again"]]
+
+
+def test_user_report_tables_and_chart_jobs(catalog, write_export, tmp_path):
+    user, charts = write_user_report(write_export(PLAYS), catalog, str(tmp_path / "user"))
+
+    assert all(os.path.exists(tmp_path / "user" / table) for table in user['tables'])
+    assert "recommendations.csv" in user['tables']
+    assert sorted(os.path.basename(path) for path in charts) == [
+        "listening_patterns.png", "music_profile.png", "top_artists.png"]
+
+
+def test_report_keeps_going_past_a_broken_export(catalog_csv, write_export, tmp_path):
+    good = write_export(PLAYS, "good.json")
+    broken = tmp_path / "broken.json"
+    broken.write_text("{}", encoding='utf-8')
+    output_dir = str(tmp_path / "report")
+
+    manifest = run_report(catalog_csv, [good, str(broken)], output_dir, workers=1, log=lambda message: None)
+
+    assert list(manifest['users']) == ["good"]
+    assert len(manifest['errors']) == 1 and "broken.json" in manifest['errors'][0]
+    assert os.path.join("users", "good", "music_profile.png") in manifest['charts']
+    assert all(os.path.exists(os.path.join(output_dir, chart)) for chart in manifest['charts'])
+    with open(os.path.join(output_dir, "report.json"), encoding='utf-8') as file:
+        assert json.load(file) == manifest
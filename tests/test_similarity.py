@@ -0,0 +1,34 @@
+import numpy as np
+import similarity
+from history_join import match_history
+from similarity import recommend_for_history, recommend_for_match, similar_songs
+
+
+def test_recommendations_for_history_without_catalog_matches(catalog, make_history):
+    history = make_history([{'artistName': "Nobody Known", 'trackName': "No Such Song"}])
+
+    mix, per_song = recommend_for_history(history, catalog, k=3)
+
+    assert mix.empty and per_song.empty
+    assert {'artist', 'song', 'distance'} <= set(mix.columns)
+    assert {'seed_artist', 'seed_song', 'artist', 'song'} <= set(per_song.columns)
+
+
+def test_similar_songs_never_returns_the_seed(catalog):
+    result = similar_songs(catalog, [0, 1], k=2)
+
+    assert len(result) == 4
+    assert not np.any(result['row'].to_numpy() == np.repeat([0, 1], 2))
+
+
+def test_recommendations_reuse_an_existing_match(catalog, make_history, monkeypatch):
+    history = make_history([{'artistName': "Faith Hill", 'trackName': "Breathe"}])
+    match = match_history(history, catalog, fuzzy=True)
+
+    def no_second_match(*args, **kwargs):
+        raise AssertionError("the history was matched again")
+    monkeypatch.setattr(similarity, "match_history", no_second_match)
+    mix, per_song = recommend_for_match(match, k=2)
+
+    assert len(mix) == 2 and "Breathe" not in set(mix['song'])
+    assert set(per_song['seed_song']) == {"Breathe"}
@@ -0,0 +1,15 @@
+from temporal import ListeningTimeline
+
+
+def test_track_skip_rates_keep_shared_titles_apart(make_history):
+    records = [
+        {'endTime': "2024-01-01 10:00", 'artistName': "A", 'trackName': "Intro", 'msPlayed': 5000},
+        {'endTime': "2024-01-01 10:05", 'artistName': "B", 'trackName': "Intro", 'msPlayed': 200000},
+        {'endTime': "2024-01-01 10:10", 'artistName': "B", 'trackName': "Intro", 'msPlayed': 180000},
+    ]
+
+    rates = ListeningTimeline(make_history(records)).skip_rates(by='track')
+
+    assert rates.loc[("A", "Intro"), 'skipRate'] == 1.0
+    assert rates.loc[("B", "Intro"), 'plays'] == 2
+    assert rates.loc[("B", "Intro"), 'skipRate'] == 0.0
@@ -0,0 +1,32 @@
+import numpy as np
+from topk import top_k_per_group, top_k_positions
+
+
+def test_top_k_positions_largest_first():
+    values = np.array([3, 9, 1, 7, 9])
+    assert list(top_k_positions(values, 3)) == [1, 4, 3]
+    assert len(top_k_positions(values, 0)) == 0
+
+
+def test_top_k_per_group_matches_a_full_sort():
+    rng = np.random.default_rng(0)
+    groups = rng.integers(0, 12, 2000)
+    groups[groups == 5] = 6  # a group without members
+    values = rng.integers(0, 30, 2000)  # many ties
+
+    positions, top_groups, ranks = top_k_per_group(groups, values, 4)
+
+    order = np.lexsort((np.arange(len(values)), -values, groups))
+    sorted_groups = groups[order]
+    expected_ranks = np.arange(len(order)) - np.searchsorted(sorted_groups, sorted_groups)
+    keep = expected_ranks < 4
+    assert list(positions) == list(order[keep])
+    assert list(top_groups) == list(sorted_groups[keep])
+    assert list(ranks) == list(expected_ranks[keep])
+
+
+def test_top_k_per_group_small_groups_keep_every_member():
+    positions, top_groups, ranks = top_k_per_group([1, 1, 0], [5.0, 6.0, 1.0], 3)
+    assert list(positions) == [2, 1, 0]
+    assert list(top_groups) == [0, 1, 1]
+    assert list(ranks) == [0, 0, 1]
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+def top_k_positions(values, k):
+    """
+    Summary: positions of the k largest values, largest first. np.argpartition
+    selects them in O(n), only those k are then sorted.
+    """
+    values = np.asarray(values)
+    k = min(k, len(values))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(values):
+        candidates = np.argpartition(-values, k - 1)[:k]
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(-values[candidates], kind='stable')]
+
+
+def top_k(series, k):
+    """
+    Summary: the k largest entries of a Series, largest first, without sorting the rest
+    """
+    return series.iloc[top_k_positions(series.to_numpy(), k)]
+
+
+def top_k_per_group(groups, values, k):
+    """
+    Summary: positions of the k largest values within every group. groups are integer
+    codes. Returns (positions, group of each position, rank within group), ordered by
+    group then rank, ties kept in position order.
+    Positions are bucketed by group with a counting sort (radix for up to 65536 groups),
+    then each group keeps its k largest with np.argpartition and sorts only those:
+    O(n + groups x k log k) instead of sorting all n values.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    values = np.asarray(values)
+    empty = np.empty(0, dtype=np.int64)
+    if len(values) == 0 or k <= 0:
+        return empty, empty, empty
+    n_groups = int(groups.max()) + 1
+    keys = groups.astype(np.uint16) if n_groups <= 1 << 16 else groups
+    order = np.argsort(keys, kind='stable')
+    offsets = np.zeros(n_groups + 1, dtype=np.int64)
+    np.cumsum(np.bincount(groups, minlength=n_groups), out=offsets[1:])
+
+    positions = []
+    for group in np.flatnonzero(offsets[1:] > offsets[:-1]):
+        members = order[offsets[group]:offsets[group + 1]]
+        if len(members) > k:
+            # The k-th largest value by partition, ties at it filled in position order
+            negated = -values[members]
+            kth = np.partition(negated, k - 1)[k - 1]
+            above = members[negated < kth]
+            members = np.sort(np.concatenate([above, members[negated == kth][:k - len(above)]]))
+        positions.append(members[np.argsort(-values[members], kind='stable')])
+    positions = np.concatenate(positions)
+    sizes = np.minimum(np.diff(offsets), k)
+    top_groups = np.repeat(np.arange(n_groups), sizes)
+    rank = np.arange(len(positions)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    return positions, top_groups, rank